@@ -1,33 +1,109 @@
 """
 Loyd's Fifteen puzzle - solver and visualizer
-Note that solved configuration has the blank (zero) tile in upper left
+Note that solved configuration has the blank (zero) tile in upper left,
+unless a different goal grid is given
 Use the arrows key to swap this tile with its neighbors
 """
 
+import time
 import poc_fifteen_gui
 
+# worker processes are optional, CodeSkulptor has no multiprocessing
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+# files for the checkpoint of solve_batch, CodeSkulptor has no os module
+try:
+    import os
+except ImportError:
+    os = None
+
+# compiled flat board functions, built from puzzle_accel.c, are optional
+try:
+    import puzzle_accel
+except ImportError:
+    puzzle_accel = None
+
+# moves of the zero tile, the index is the 2-bit code of a move
+MOVES = "lrud"
+
+# row and column offset of the tile the zero tile swaps with, per move
+MOVE_OFFSETS = {"l": (0, -1), "r": (0, 1), "u": (-1, 0), "d": (1, 0)}
+
+# direction that reverts each move of the zero tile
+INVERSE_MOVES = {"l": "r", "r": "l", "u": "d", "d": "u"}
+
+# direction of each move after mirroring the puzzle in its main diagonal
+TRANSPOSED_MOVES = {"l": "u", "r": "d", "u": "l", "d": "r"}
+
+# depth at which solve_optimal splits the search tree into subtrees
+# for its worker processes
+SPLIT_DEPTH = 4
+
+# flag shared by the worker processes of solve_optimal, set when solved
+WORKER_STATE = {}
+
+# move strings of the phase methods per puzzle size, keyed by the phase,
+# the target position and the position of the target tile
+MACRO_TABLES = {}
+
+# shortest move strings of the final part of solve_puzzle, per size
+ENDGAME_TABLES = {}
+
+# index the zero tile moves to from each position, per puzzle size
+NEIGHBOR_TABLES = {}
+
+# moves between two keyframes of a SolutionExporter stream
+KEYFRAME_INTERVAL = 64
+
+# search nodes between two "nodes" progress events
+TELEMETRY_INTERVAL = 10000
+
+# solutions found by solve_optimal, keyed by canonical puzzle key
+OPTIMAL_CACHE = {}
+CACHE_LIMIT = 10000
+
 
 class Puzzle:
     """
     Class representation for the Fifteen puzzle
     """
 
-    def __init__(self, puzzle_height, puzzle_width, initial_grid=None):
+    def __init__(self, puzzle_height, puzzle_width, initial_grid=None,
+                 goal_grid=None):
         """
-        Initialize puzzle with default height and width
+        Initialize puzzle with default height and width, the solved
+        configuration is goal_grid (default: value col + width * row at
+        (row, col), zero tile in upper left) and the default grid
         Returns a Puzzle object
         """
         self._height = puzzle_height
         self._width = puzzle_width
-        self._grid = [[col + puzzle_width * row
-                       for col in range(self._width)]
-                      for row in range(self._height)]
+        self._init_goal(goal_grid)
+        self._grid = [list(row) for row in self._goal]
 
         if initial_grid != None:
             for row in range(puzzle_height):
                 for col in range(puzzle_width):
                     self._grid[row][col] = initial_grid[row][col]
 
+        # bits per tile in the packed encoding of the grid
+        self._tile_bits = 1
+        while 1 << self._tile_bits < puzzle_height * puzzle_width:
+            self._tile_bits += 1
+
+        self._evaluate()
+
+        # subscribers to solver progress events
+        self._listeners = []
+        self._nodes = 0
+        self._start_time = time.time()
+
+        # set by another worker process once the puzzle is solved
+        self._stop_flag = None
+
     def __str__(self):
         """
         Generate string representaion for puzzle
@@ -68,15 +144,77 @@ class Puzzle:
         Setter for the number at tile position pos
         """
         self._grid[row][col] = value
+        self._evaluate()
 
     def clone(self):
         """
         Make a copy of the puzzle to update during solving
         Returns a Puzzle object
         """
-        new_puzzle = Puzzle(self._height, self._width, self._grid)
+        new_puzzle = Puzzle(self._height, self._width, self._grid, self._goal)
         return new_puzzle
 
+    def add_listener(self, listener):
+        """
+        Subscribe listener(event, data) to the progress events of the
+        solvers: "phase" and "tile" from solve_puzzle, "bound" and
+        sampled "nodes" from the searches and "done" at the end.
+        data is a dictionary that always holds the elapsed seconds
+        """
+        self._listeners.append(listener)
+
+    def get_encoding(self):
+        """
+        Getter for the grid packed into a single integer, tile_bits bits
+        per tile in row major order
+        Returns an integer
+        """
+        return self._encoding
+
+    def set_encoding(self, encoding):
+        """
+        Setter for the grid from an integer packed by get_encoding
+        """
+        mask = (1 << self._tile_bits) - 1
+        for row in range(self._height):
+            for col in range(self._width):
+                self._grid[row][col] = encoding & mask
+                encoding >>= self._tile_bits
+        self._evaluate()
+
+    def get_goal(self):
+        """
+        Getter for the solved configuration
+        Returns a list of lists of integers
+        """
+        return [list(row) for row in self._goal]
+
+    def transpose(self):
+        """
+        Make a copy of the puzzle mirrored in its main diagonal, tiles are
+        relabeled so a solved puzzle maps to the solved transposed puzzle
+        Returns a Puzzle object
+        """
+        return Puzzle(self._width, self._height,
+                      self._transpose_grid(self._grid),
+                      self._transpose_grid(self._goal))
+
+    def canonical_key(self):
+        """
+        Generate a key shared by the puzzle and its transpose, for wide
+        puzzles the key of the puzzle itself, for tall puzzles the key of
+        the transpose and for square puzzles the smaller of both
+        Returns a tuple of the key and whether it is the transpose's key
+        """
+        key = self._key()
+        if self._height < self._width:
+            return key, False
+
+        transposed_key = self.transpose()._key()
+        if self._height > self._width or transposed_key < key:
+            return transposed_key, True
+        return key, False
+
     ########################################################
     # Core puzzle methods
 
@@ -86,46 +224,74 @@ class Puzzle:
         position (solved_row, solved_col) when the puzzle is solved
         Returns a tuple of two integers
         """
-        solved_value = (solved_col + self._width * solved_row)
+        solved_value = self._phase_goal[solved_row][solved_col]
 
-        for row in range(self._height):
-            for col in range(self._width):
-                if self._grid[row][col] == solved_value:
-                    return (row, col)
-        assert False, "Value " + str(solved_value) + " not found"
+        position = self._positions[solved_value]
+        assert position is not None, "Value " + str(solved_value) + " not found"
+        return position
 
     def update_puzzle(self, move_string):
         """
         Updates the puzzle state based on the provided move string
         """
-        zero_row, zero_col = self.current_position(0, 0)
         for direction in move_string:
-            if direction == "l":
-                assert zero_col > 0, "move off grid: " + direction
-                self._grid[zero_row][zero_col] = self._grid[zero_row][
-                    zero_col - 1]
-                self._grid[zero_row][zero_col - 1] = 0
-                zero_col -= 1
-            elif direction == "r":
-                assert zero_col < self._width - 1, "move off grid: " + direction
-                self._grid[zero_row][zero_col] = self._grid[zero_row][
-                    zero_col + 1]
-                self._grid[zero_row][zero_col + 1] = 0
-                zero_col += 1
-            elif direction == "u":
-                assert zero_row > 0, "move off grid: " + direction
-                self._grid[zero_row][zero_col] = self._grid[zero_row - 1][
-                    zero_col]
-                self._grid[zero_row - 1][zero_col] = 0
-                zero_row -= 1
-            elif direction == "d":
-                assert zero_row < self._height - 1, "move off grid: " + direction
-                self._grid[zero_row][zero_col] = self._grid[zero_row + 1][
-                    zero_col]
-                self._grid[zero_row + 1][zero_col] = 0
-                zero_row += 1
-            else:
-                assert False, "invalid direction: " + direction
+            assert direction in MOVE_OFFSETS, "invalid direction: " + direction
+            offset_row, offset_col = MOVE_OFFSETS[direction]
+            tile_row = self._zero_row + offset_row
+            tile_col = self._zero_col + offset_col
+            assert (0 <= tile_row < self._height and
+                    0 <= tile_col < self._width), "move off grid: " + direction
+            self._slide_tile(tile_row, tile_col)
+
+    def undo_move(self, move_string):
+        """
+        Reverts the puzzle state to before the provided move string
+        was applied, heuristic values are restored along with it
+        """
+        for direction in reversed(move_string):
+            assert direction in INVERSE_MOVES, "invalid direction: " + direction
+            self.update_puzzle(INVERSE_MOVES[direction])
+
+    ##################################################################
+    # Heuristic methods
+
+    def get_manhattan(self):
+        """
+        Getter for the summed manhattan distance of all tiles
+        to their solved positions (zero tile excluded)
+        Returns an integer
+        """
+        return self._manhattan
+
+    def get_linear_conflict(self):
+        """
+        Getter for the linear conflict penalty of all rows and columns
+        Returns an integer
+        """
+        return self._linear_conflict
+
+    def lower_bound(self):
+        """
+        Admissible estimate of the number of moves to solve the puzzle:
+        the exact distance for sizes covered by an endgame table,
+        manhattan distance plus linear conflict otherwise
+        Returns an integer
+        """
+        if self._height * self._width <= 6:
+            key, dummy_transposed = self.canonical_key()
+            table = self._endgame_table(key[0], key[1])
+            if key in table:
+                return len(table[key])
+        return self._manhattan + self._linear_conflict
+
+    def upper_bound(self):
+        """
+        Length of the solution found by solve_puzzle, on a clone
+        Returns an integer
+        """
+        if self._manhattan == 0:
+            return 0
+        return len(self.clone().solve_puzzle())
 
     ##################################################################
     # Phase one methods
@@ -161,6 +327,563 @@ class Puzzle:
         # check input
         assert self.lower_row_invariant(target_row, target_col)
 
+        # the moves only depend on the position of the target tile
+        result = self._run_macro(
+            ("interior", target_row, target_col,
+             self.current_position(target_row, target_col)),
+            lambda: self._interior_tile_moves(target_row, target_col))
+
+        # check output
+        assert self.lower_row_invariant(target_row, target_col - 1)
+
+        return result
+
+    def solve_col0_tile(self, target_row):
+        """
+        Solve tile in column zero on specified row (> 1)
+        Updates puzzle and returns a move string
+        """
+        # input check
+        assert self.lower_row_invariant(target_row, 0)
+
+        # the moves only depend on the position of the target tile
+        result = self._run_macro(
+            ("col0", target_row, self.current_position(target_row, 0)),
+            lambda: self._col0_tile_moves(target_row))
+
+        # output check
+        assert self.lower_row_invariant(target_row - 1, self.get_width() - 1)
+
+        # return string path
+        return result
+
+    #############################################################
+    # Phase two methods
+
+    def row0_invariant(self, target_col):
+        """
+        Check whether the puzzle satisfies the row zero invariant
+        at the given column (col > 1)
+        Returns a boolean
+        """
+        # check 1: zero at (0, j)
+        zero_row, zero_col = self.current_position(0, 0)
+        if not (zero_row == 0 and zero_col == target_col):
+            return False
+
+        # check2a: positions below and to right of (1, j) solved
+        if not (self._solved_below(1, target_col) and self._solved_right(1,
+                                                                         target_col)):
+            return False
+
+        # check 2b: check if solved at position (1, j)
+        if not self._solved_at(1, target_col):
+            return False
+        return True
+
+    def row1_invariant(self, target_col):
+        """
+        Check whether the puzzle satisfies the row one invariant
+        at the given column (col > 1)
+        Returns a boolean
+        """
+        # check 1: zero at (1, j)
+        zero_row, zero_col = self.current_position(0, 0)
+        if not (zero_row == 1 and zero_col == target_col):
+            return False
+
+        # check2: positions below or to right are solved
+        if not self.lower_row_invariant(1, target_col):
+            return False
+
+        return True
+
+    def solve_row0_tile(self, target_col):
+        """
+        Solve the tile in row zero at the specified column
+        Updates puzzle and returns a move string
+        """
+        # input check
+        assert self.row0_invariant(target_col)
+
+        # the moves only depend on the position of the target tile
+        result = self._run_macro(
+            ("row0", target_col, self.current_position(0, target_col)),
+            lambda: self._row0_tile_moves(target_col))
+
+        # output check
+        assert self.row1_invariant(target_col - 1)
+
+        return result
+
+    def solve_row1_tile(self, target_col):
+        """
+        Solve the tile in row one at the specified column
+        Updates puzzle and returns a move string
+        """
+        # input check
+        assert self.row1_invariant(target_col)
+
+        # the moves only depend on the position of the target tile
+        result = self._run_macro(
+            ("row1", target_col, self.current_position(1, target_col)),
+            lambda: self._row1_tile_moves(target_col))
+
+        # output check
+        assert self.row0_invariant(target_col)
+
+        return result
+
+    ###########################################################
+    # Phase 3 methods
+
+    def solve_2x2(self):
+        """
+        Solve the upper left 2x2 part of the puzzle
+        Updates the puzzle and returns a move string
+        """
+        # input check. tile zero is at (1,1)
+        assert self.row1_invariant(1)
+
+        # init
+        result = ""
+        count = 0
+
+        # move zero to (0,0)
+        self.update_puzzle("lu")
+        result += "lu"
+
+        while not self._solved_2x2():
+            self.update_puzzle("rdlu")
+            result += "rdlu"
+            count += 1
+            if count == 3:
+                break
+
+        assert self._solved_2x2()
+
+        return result
+
+    def solve_2x3(self):
+        """
+        Solve the upper left 2x3 part of the puzzle with a shortest
+        move string from the endgame table
+        Updates the puzzle and returns a move string
+        """
+        # input check. tile zero is at (1,2)
+        assert self.row1_invariant(2)
+
+        result = self._solve_region(2, 3)
+
+        assert self.lower_row_invariant(0, 0)
+
+        return result
+
+    def solve_3x2(self):
+        """
+        Solve the upper left 3x2 part of a puzzle of width two with a
+        shortest move string from the (transposed) endgame table
+        Updates the puzzle and returns a move string
+        """
+        # input check. tile zero is at (2,1)
+        assert self.get_width() == 2 and self.lower_row_invariant(2, 1)
+
+        result = self._solve_region(3, 2)
+
+        assert self.lower_row_invariant(0, 0)
+
+        return result
+
+    def solve_puzzle(self, exporter=None):
+        """
+        Generate a solution string for a puzzle, the moves of each
+        phase are passed to the optional exporter as soon as they are known
+        Updates the puzzle and returns a move string
+        """
+
+        # init
+        result = ""
+        width = self.get_width()
+        height = self.get_height()
+        phase = None
+        tiles = 0
+        self._start_solve()
+
+        # bring zero to last tile
+        result += self._export(exporter, self._zero_to_end())
+        zero_row, zero_col = self.current_position(0, 0)
+
+        if width == 2 and height == 2:
+            phase = self._enter_phase(phase, "2x2")
+            result += self._export(exporter, self.solve_2x2())
+        else:
+            while True:
+                # endgame: wide puzzles end in the upper left 2x3 part,
+                # puzzles of width two in the upper left 3x2 part
+                if width > 2 and zero_row == 1 and zero_col == 2:
+                    phase = self._enter_phase(phase, "2x3")
+                    result += self._export(exporter, self.solve_2x3())
+                    break
+                if width == 2 and zero_row == 2 and zero_col == 1:
+                    phase = self._enter_phase(phase, "3x2")
+                    result += self._export(exporter, self.solve_3x2())
+                    break
+
+                if zero_row > 1 and zero_col > 0:
+                    phase = self._enter_phase(phase, "interior")
+                    moves = self.solve_interior_tile(zero_row, zero_col)
+                elif zero_row > 1 and zero_col == 0:
+                    phase = self._enter_phase(phase, "col0")
+                    moves = self.solve_col0_tile(zero_row)
+                elif zero_row == 1 and zero_col > 1:
+                    phase = self._enter_phase(phase, "row1")
+                    moves = self.solve_row1_tile(zero_col)
+                else:
+                    phase = self._enter_phase(phase, "row0")
+                    moves = self.solve_row0_tile(zero_col)
+                result += self._export(exporter, moves)
+                tiles += 1
+                if self._listeners:
+                    self._publish("tile", {"tiles": tiles})
+                zero_row, zero_col = self.current_position(0, 0)
+
+        # move the zero tile from (0, 0) to its solved position
+        self.update_puzzle(self._goal_moves)
+        result += self._export(exporter, self._goal_moves)
+
+        if self._listeners:
+            self._publish("done", {"moves": len(result)})
+        return result
+
+    ###########################################################
+    # Optimal search methods
+
+    def solve_optimal(self, processes=1):
+        """
+        Generate a shortest solution string with IDA*, using manhattan
+        distance plus linear conflict as admissible heuristic. With
+        processes > 1 the subtrees below SPLIT_DEPTH are searched by a pool
+        of worker processes, serially where processes are not available.
+        Transposed puzzles share their entry in the solution cache
+        Updates the puzzle and returns a move string
+        """
+        self._start_solve()
+        key, transposed = self.canonical_key()
+        if key in OPTIMAL_CACHE:
+            result = OPTIMAL_CACHE[key]
+            if transposed:
+                result = self._transpose_moves(result)
+            self.update_puzzle(result)
+        else:
+            result = self._search_optimal(processes)
+            if len(OPTIMAL_CACHE) < CACHE_LIMIT:
+                if transposed:
+                    OPTIMAL_CACHE[key] = self._transpose_moves(result)
+                else:
+                    OPTIMAL_CACHE[key] = result
+
+        if self._listeners:
+            self._publish("done", {"moves": len(result), "nodes": self._nodes})
+        return result
+
+    def solve_astar(self, max_states=1000000):
+        """
+        Generate a shortest solution string with A*, keeping the boards as
+        packed encodings in a StateStore of at most max_states boards,
+        seen and open boards together. Falls back to the memory-free
+        solve_optimal when the store is full
+        Updates the puzzle and returns a move string
+        """
+        assert self._is_solvable(), "puzzle is not solvable"
+
+        # init
+        self._start_solve()
+        start = self._encoding
+        store = StateStore(max_states)
+        store.add(start, 0, None)
+        store.push(start, self._manhattan + self._linear_conflict)
+
+        # the boards on the path from start to the current board, by depth
+        depths = {start: 0}
+        path = []
+
+        while True:
+            encoding, bound = store.pop()
+            self._walk_to(encoding, store, depths, path)
+
+            # skip entries that were reached again with a lower cost
+            cost = store.get_cost(encoding)
+            if cost + self._manhattan + self._linear_conflict != bound:
+                continue
+            if self._manhattan == 0:
+                break
+
+            self._nodes += 1
+            if self._listeners and self._nodes % TELEMETRY_INTERVAL == 0:
+                self._publish("nodes", {"nodes": self._nodes, "bound": bound,
+                                        "states": store.get_size()})
+
+            for direction in self._next_moves(store.get_move(encoding)):
+                self.update_puzzle(direction)
+                child = self._encoding
+                if not store.has_state(child) or store.get_cost(child) > cost + 1:
+                    estimate = cost + 1 + self._manhattan + self._linear_conflict
+                    if not (store.add(child, cost + 1, direction) and
+                            store.push(child, estimate)):
+                        self.set_encoding(start)
+                        return self.solve_optimal()
+                self.undo_move(direction)
+
+        # walk back from the solved board along the stored moves
+        path = []
+        while self._encoding != start:
+            direction = store.get_move(self._encoding)
+            path.append(direction)
+            self.undo_move(direction)
+        path.reverse()
+
+        result = "".join(path)
+        self.update_puzzle(result)
+        if self._listeners:
+            self._publish("done", {"moves": len(result), "nodes": self._nodes})
+        return result
+
+    def _search_optimal(self, processes):
+        """
+        helper function. runs the IDA* iterations of solve_optimal
+        Updates the puzzle and returns a move string
+        """
+        assert self._is_solvable(), "puzzle is not solvable"
+
+        # init
+        path = []
+        subtrees = None
+        pool = None
+        bound = self._manhattan + self._linear_conflict
+
+        try:
+            while True:
+                if self._listeners:
+                    self._publish("bound", {"bound": bound,
+                                            "nodes": self._nodes})
+
+                # shallow bounds are searched from the root directly
+                if bound >= SPLIT_DEPTH and subtrees is None:
+                    pool = _open_pool(processes, self._height, self._width,
+                                      self._grid, self._goal)
+                    subtrees = self._split_subtrees(SPLIT_DEPTH)
+                if bound < SPLIT_DEPTH or pool is None:
+                    next_bound = self._bounded_search(0, bound, None, path)
+                else:
+                    next_bound = self._search_subtrees(pool, subtrees, bound,
+                                                       path)
+
+                if next_bound is True:
+                    return "".join(path)
+                assert next_bound is not None, "no solution found"
+                bound = next_bound
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    def _split_subtrees(self, depth):
+        """
+        helper function. collects the move strings of length depth,
+        each one roots a subtree of the search
+        """
+        subtrees = []
+        self._collect_subtrees("", depth, subtrees)
+        return subtrees
+
+    def _collect_subtrees(self, prefix, depth, subtrees):
+        """
+        helper function. walks all move strings below prefix
+        """
+        if len(prefix) == depth:
+            subtrees.append(prefix)
+            return
+
+        for direction in self._next_moves(prefix[-1:]):
+            self.update_puzzle(direction)
+            self._collect_subtrees(prefix + direction, depth, subtrees)
+            self.undo_move(direction)
+
+    def _search_subtrees(self, pool, subtrees, bound, path):
+        """
+        helper function. runs one IDA* iteration with the subtrees handed
+        out one at a time to idle workers, the smallest estimate exceeding
+        bound is shared between them and the first solution is optimal
+        Returns True when solved (puzzle and path updated) or the next bound
+        """
+        WORKER_STATE["solved"].value = 0
+        tasks = [(prefix, bound) for prefix in subtrees]
+
+        next_bound = None
+        for moves, result, nodes in pool.imap_unordered(_search_worker,
+                                                        tasks):
+            self._nodes += nodes
+            if self._listeners:
+                self._publish("nodes", {"nodes": self._nodes, "bound": bound})
+            if moves is not None:
+                self.update_puzzle(moves)
+                path.extend(moves)
+                return True
+            if result is not None and (next_bound is None or
+                                       result < next_bound):
+                next_bound = result
+        return next_bound
+
+    def _search_subtree(self, prefix, bound):
+        """
+        helper function. runs one IDA* iteration below prefix in a worker
+        process, stops early once another worker has solved the puzzle
+        Returns a tuple of the move string (None if not solved), the next
+        bound and the number of searched boards
+        """
+        self._stop_flag = WORKER_STATE["solved"]
+        self._nodes = 0
+        self.update_puzzle(prefix)
+        path = list(prefix)
+        result = self._bounded_search(len(prefix), bound, prefix[-1], path)
+
+        if result is True and self._manhattan == 0:
+            self._stop_flag.value = 1
+            return "".join(path), None, self._nodes
+        if result is True:
+            return None, None, self._nodes
+        return None, result, self._nodes
+
+    def _bounded_search(self, depth, bound, last_move, path):
+        """
+        helper function. depth first search below the current board
+        that prunes boards whose estimate exceeds bound
+        Returns True when solved (puzzle and path updated) or stopped by
+        another worker, else the smallest estimate that exceeded bound,
+        None if there is none
+        """
+        estimate = depth + self._manhattan + self._linear_conflict
+        if estimate > bound:
+            return estimate
+        if self._manhattan == 0:
+            return True
+
+        self._nodes += 1
+        if self._nodes % TELEMETRY_INTERVAL == 0:
+            if self._listeners:
+                self._publish("nodes", {"nodes": self._nodes, "bound": bound})
+            if self._stop_flag is not None and self._stop_flag.value:
+                return True
+
+        # moves come from _next_moves, slide the tiles without checks
+        next_bound = None
+        for direction in self._next_moves(last_move):
+            offset_row, offset_col = MOVE_OFFSETS[direction]
+            self._slide_tile(self._zero_row + offset_row,
+                             self._zero_col + offset_col)
+            path.append(direction)
+            result = self._bounded_search(depth + 1, bound, direction, path)
+            if result is True:
+                return True
+            path.pop()
+            self._slide_tile(self._zero_row - offset_row,
+                             self._zero_col - offset_col)
+            if result is not None and (next_bound is None or
+                                       result < next_bound):
+                next_bound = result
+        return next_bound
+
+    def _walk_to(self, encoding, store, depths, path):
+        """
+        helper function. brings the puzzle to a stored board: follows its
+        stored moves back to the nearest board on path, the moves made
+        since the start board, unmakes the moves below that board and
+        makes the ones leading to the stored board. depths maps the boards
+        on path to their depth
+        """
+        bits = self._tile_bits
+        mask = (1 << bits) - 1
+        zero = 0
+        while (encoding >> (bits * zero)) & mask:
+            zero += 1
+
+        # the parent board has the moved tile back at the zero position
+        branch = []
+        while encoding not in depths:
+            direction = store.get_move(encoding)
+            offset_row, offset_col = MOVE_OFFSETS[direction]
+            parent_zero = zero - offset_col - self._width * offset_row
+            value = (encoding >> (bits * parent_zero)) & mask
+            encoding += (value << (bits * zero)) - (value << (bits * parent_zero))
+            zero = parent_zero
+            branch.append(direction)
+
+        while len(path) > depths[encoding]:
+            del depths[self._encoding]
+            self.undo_move(path.pop())
+        for direction in reversed(branch):
+            self.update_puzzle(direction)
+            path.append(direction)
+            depths[self._encoding] = len(path)
+
+    ###########################################################
+    # helper functions
+
+    def _solved_below(self, target_row, target_col):
+        """
+        helper function. checks if puzzle is solved below target_row
+        """
+        height = self.get_height()
+        width = self.get_width()
+        if target_row + 1 <= height - 1:
+            for row_index in range(target_row + 1, height):
+                for col_index in range(width):
+                    if self._grid[row_index][col_index] != self._phase_goal[
+                            row_index][col_index]:
+                        return False
+        return True
+
+    def _solved_right(self, target_row, target_col):
+        """
+        helper function. checks if puzzle is solved to the right of target_col
+        """
+        width = self.get_width()
+        if target_col + 1 <= width - 1:
+            for col_index in range(target_col + 1, width):
+                if self._grid[target_row][col_index] != self._phase_goal[
+                        target_row][col_index]:
+                    return False
+        return True
+
+    def _solved_at(self, target_row, target_col):
+        """
+        helper function. checks if puzzle is solved at target position
+        """
+        return self._grid[target_row][target_col] == self._phase_goal[
+            target_row][target_col]
+
+    def _run_macro(self, key, build_moves):
+        """
+        helper function. looks up the move string of a tile placement in
+        the macro table of this puzzle size and applies it. The first time
+        a key is seen, build_moves places the tile step by step and its
+        move string is stored
+        Returns a move string
+        """
+        size = (self._height, self._width)
+        if size not in MACRO_TABLES:
+            MACRO_TABLES[size] = {}
+        table = MACRO_TABLES[size]
+
+        if key in table:
+            self.update_puzzle(table[key])
+        else:
+            table[key] = build_moves()
+        return table[key]
+
+    def _interior_tile_moves(self, target_row, target_col):
+        """
+        helper function. moves of solve_interior_tile
+        """
         # init
         result = ""
 
@@ -204,22 +927,15 @@ class Puzzle:
             self.update_puzzle("ld")
             result += "ld"
 
-            # check output
-        assert self.lower_row_invariant(target_row, target_col - 1)
-
         return result
 
-    def solve_col0_tile(self, target_row):
+    def _col0_tile_moves(self, target_row):
         """
-        Solve tile in column zero on specified row (> 1)
-        Updates puzzle and returns a move string
+        helper function. moves of solve_col0_tile
         """
         # init
         result = ""
 
-        # input check
-        assert self.lower_row_invariant(target_row, 0)
-
         # step 1a: move zero tile to target_tile
         result += self._zero_to_target(target_row, 0)
 
@@ -271,75 +987,26 @@ class Puzzle:
                     target_row, 0)
                 zero_row, zero_col = self.current_position(0, 0)
 
-                # end position: zero_tile left of target_tile
-
-        # step 2: apply move string of 3x2 puzzle, described in homework 9
-        if not (target_tile_row == target_row and target_tile_col == 0):
-            self.update_puzzle("ruldrdlurdluurddlur")
-            result += "ruldrdlurdluurddlur"
-
-        # step3: move zero to right end of row i - 1
-        zero_row, zero_col = self.current_position(0, 0)
-        while zero_col < (self.get_width() - 1):
-            self.update_puzzle("r")
-            result += "r"
-            zero_row, zero_col = self.current_position(0, 0)
-
-        # output check
-        assert self.lower_row_invariant(target_row - 1, self.get_width() - 1)
-
-        # return string path
-        return result
-
-    #############################################################
-    # Phase two methods
-
-    def row0_invariant(self, target_col):
-        """
-        Check whether the puzzle satisfies the row zero invariant
-        at the given column (col > 1)
-        Returns a boolean
-        """
-        # check 1: zero at (0, j)
-        zero_row, zero_col = self.current_position(0, 0)
-        if not (zero_row == 0 and zero_col == target_col):
-            return False
-
-        # check2a: positions below and to right of (1, j) solved
-        if not (self._solved_below(1, target_col) and self._solved_right(1,
-                                                                         target_col)):
-            return False
-
-        # check 2b: check if solved at position (1, j)
-        if not self._solved_at(1, target_col):
-            return False
-        return True
-
-    def row1_invariant(self, target_col):
-        """
-        Check whether the puzzle satisfies the row one invariant
-        at the given column (col > 1)
-        Returns a boolean
-        """
-        # check 1: zero at (1, j)
-        zero_row, zero_col = self.current_position(0, 0)
-        if not (zero_row == 1 and zero_col == target_col):
-            return False
+                # end position: zero_tile left of target_tile
 
-        # check2: positions below or to right are solved
-        if not self.lower_row_invariant(1, target_col):
-            return False
+        # step 2: apply move string of 3x2 puzzle, described in homework 9
+        if not (target_tile_row == target_row and target_tile_col == 0):
+            self.update_puzzle("ruldrdlurdluurddlur")
+            result += "ruldrdlurdluurddlur"
 
-        return True
+        # step3: move zero to right end of row i - 1
+        zero_row, zero_col = self.current_position(0, 0)
+        while zero_col < (self.get_width() - 1):
+            self.update_puzzle("r")
+            result += "r"
+            zero_row, zero_col = self.current_position(0, 0)
 
-    def solve_row0_tile(self, target_col):
+        return result
+
+    def _row0_tile_moves(self, target_col):
         """
-        Solve the tile in row zero at the specified column
-        Updates puzzle and returns a move string
+        helper function. moves of solve_row0_tile
         """
-        # input check
-        assert self.row0_invariant(target_col)
-
         # init
         result = ""
 
@@ -388,19 +1055,12 @@ class Puzzle:
             self.update_puzzle("urdlurrdluldrruld")
             result += "urdlurrdluldrruld"
 
-        # output check
-        assert self.row1_invariant(target_col - 1)
-
         return result
 
-    def solve_row1_tile(self, target_col):
+    def _row1_tile_moves(self, target_col):
         """
-        Solve the tile in row one at the specified column
-        Updates puzzle and returns a move string
+        helper function. moves of solve_row1_tile
         """
-        # input check
-        assert self.row1_invariant(target_col)
-
         # init
         result = ""
 
@@ -419,128 +1079,93 @@ class Puzzle:
             self.update_puzzle("ur")
             result += "ur"
 
-        # output check
-        assert self.row0_invariant(target_col)
-
         return result
 
-    ###########################################################
-    # Phase 3 methods
-
-    def solve_2x2(self):
+    def _start_solve(self):
         """
-        Solve the upper left 2x2 part of the puzzle
-        Updates the puzzle and returns a move string
+        helper function. resets the node count and clock of the events
         """
-        # input check. tile zero is at (1,1)
-        assert self.row1_invariant(1)
-
-        # init
-        result = ""
-        count = 0
-
-        # move zero to (0,0)
-        self.update_puzzle("lu")
-        result += "lu"
-
-        while not self._solved_2x2():
-            self.update_puzzle("rdlu")
-            result += "rdlu"
-            count += 1
-            if count == 3:
-                break
-
-        assert self._solved_2x2()
+        self._nodes = 0
+        self._start_time = time.time()
 
-        return result
-
-    def solve_puzzle(self):
+    def _publish(self, event, data):
         """
-        Generate a solution string for a puzzle
-        Updates the puzzle and returns a move string
+        helper function. passes an event to the listeners, callers check
+        that there are any before they build the event data
         """
+        data["elapsed"] = time.time() - self._start_time
+        for listener in self._listeners:
+            listener(event, data)
 
-        # init
-        result = ""
-        width = self.get_width()
-        height = self.get_height()
-
-        # bring zero to last tile
-        result += self._zero_to_end()
-        zero_row, zero_col = self.current_position(0, 0)
-
-        if width == 2 and height == 2:
-            result += self.solve_2x2()
-        else:
-            while True:
-                if zero_row > 1 and zero_col > 0:
-                    # print '1'
-                    result += self.solve_interior_tile(zero_row, zero_col)
-                    zero_row, zero_col = self.current_position(0, 0)
-                if zero_row > 1 and zero_col == 0:
-                    # print '2'
-                    result += self.solve_col0_tile(zero_row)
-                    zero_row, zero_col = self.current_position(0, 0)
-                if zero_row == 1 and zero_col > 1:
-                    # print '3'
-                    result += self.solve_row1_tile(zero_col)
-                    zero_row, zero_col = self.current_position(0, 0)
-                if zero_row == 0 and zero_col > 1:
-                    # print '4'
-                    result += self.solve_row0_tile(zero_col)
-                    zero_row, zero_col = self.current_position(0, 0)
-                if zero_row < 2 and zero_col < 2:
-                    break
-
-            result += self.solve_2x2()
-        return result
-
-    ###########################################################
-    # helper functions
+    def _enter_phase(self, phase, next_phase):
+        """
+        helper function. publishes a "phase" event when the phase changes
+        Returns next_phase
+        """
+        if self._listeners and next_phase != phase:
+            self._publish("phase", {"phase": next_phase})
+        return next_phase
 
-    def _solved_below(self, target_row, target_col):
+    def _export(self, exporter, move_string):
         """
-        helper function. checks if puzzle is solved below target_row
+        helper function. passes move_string to the exporter, if any
+        Returns move_string
         """
-        height = self.get_height()
-        width = self.get_width()
-        solved_puzzle = Puzzle(height, width)
-        if target_row + 1 <= height - 1:
-            for row_index in range(target_row + 1, height):
-                for col_index in range(width):
-                    if solved_puzzle.get_number(row_index,
-                                                col_index) != self.get_number(
-                            row_index, col_index):
-                        return False
-        return True
+        if exporter is not None:
+            exporter.record(move_string)
+        return move_string
 
-    def _solved_right(self, target_row, target_col):
+    def _solve_region(self, rows, cols):
         """
-        helper function. checks if puzzle is solved to the right of target_col
+        helper function. solves the upper left rows x cols part of the
+        puzzle, holding all its tiles, with the endgame table. Tall parts
+        are transposed so both orientations share one table
+        Returns a move string
         """
-        height = self.get_height()
-        width = self.get_width()
-        solved_puzzle = Puzzle(height, width)
-        if target_col + 1 <= width - 1:
-            for col_index in range(target_col + 1, width):
-                if solved_puzzle.get_number(target_row,
-                                            col_index) != self.get_number(
-                        target_row, col_index):
-                    return False
-        return True
+        # label the tiles by their solved position inside the part
+        grid = [[0 for dummy_col in range(cols)] for dummy_row in range(rows)]
+        for row in range(rows):
+            for col in range(cols):
+                solved_row, solved_col = self._phase_targets[
+                    self.get_number(row, col)]
+                grid[row][col] = solved_col + cols * solved_row
+        region = Puzzle(rows, cols, grid)
+
+        key, transposed = region.canonical_key()
+        table = self._endgame_table(key[0], key[1])
+        assert key in table, "puzzle is not solvable"
+
+        result = table[key]
+        if transposed:
+            result = self._transpose_moves(result)
+        self.update_puzzle(result)
+        return result
 
-    def _solved_at(self, target_row, target_col):
+    def _endgame_table(self, rows, cols):
         """
-        helper function. checks if puzzle is solved at target position
+        helper function. breadth first search back from the solved
+        rows x cols puzzle, built once per size
+        Returns a dictionary of canonical keys to shortest move strings
         """
-        height = self.get_height()
-        width = self.get_width()
-        solved_puzzle = Puzzle(height, width)
-        if solved_puzzle.get_number(target_row, target_col) == self.get_number(
-                target_row, target_col):
-            return True
-        else:
-            return False
+        size = (rows, cols)
+        if size in ENDGAME_TABLES:
+            return ENDGAME_TABLES[size]
+
+        solved = Puzzle(rows, cols)
+        table = {solved._key(): ""}
+        queue = [solved]
+        for puzzle in queue:
+            moves = table[puzzle._key()]
+            for direction in puzzle._next_moves(None):
+                child = puzzle.clone()
+                child.update_puzzle(direction)
+                key = child._key()
+                if key not in table:
+                    table[key] = INVERSE_MOVES[direction] + moves
+                    queue.append(child)
+
+        ENDGAME_TABLES[size] = table
+        return table
 
     def _zero_to_target(self, target_row, target_col):
         """
@@ -648,7 +1273,7 @@ class Puzzle:
 
             if zero_row > 0:
                 self.update_puzzle("rulld")
-                result += "ldrul"
+                result += "rulld"
             elif zero_row == 0:
                 self.update_puzzle("rdllu")
                 result += "rdllu"
@@ -664,12 +1289,11 @@ class Puzzle:
         """
         checks if 2x2 puzzle is solved
         """
-        if self.get_number(0, 0) == 0 and self.get_number(0,
-                                                          1) == 1 and self.get_number(
-                1, 0) == self.get_width() and self.get_number(1, 1) == (
-            self.get_width() + 1):
-            return True
-        return False
+        for row in range(2):
+            for col in range(2):
+                if self.get_number(row, col) != self._phase_goal[row][col]:
+                    return False
+        return True
 
     def _move_target_down_to(self, specified_row, target_row, target_col):
         """
@@ -701,6 +1325,193 @@ class Puzzle:
                 target_row, target_col)
         return result
 
+    def _init_goal(self, goal_grid):
+        """
+        helper function. precomputes the solved position of every value.
+        The phase methods solve to the goal with its zero tile moved up
+        and left to (0, 0), solve_puzzle then moves it back
+        """
+        if goal_grid is None:
+            goal_grid = [[col + self._width * row
+                          for col in range(self._width)]
+                         for row in range(self._height)]
+        self._goal = [list(row) for row in goal_grid]
+        self._targets = self._target_map(self._goal)
+        self._solved_rows = [row for row, dummy_col in self._targets]
+        self._solved_cols = [col for dummy_row, col in self._targets]
+
+        zero_row, zero_col = self._targets[0]
+        phase_goal = [list(row) for row in self._goal]
+        for row in range(zero_row, 0, -1):
+            phase_goal[row][zero_col] = phase_goal[row - 1][zero_col]
+            phase_goal[row - 1][zero_col] = 0
+        for col in range(zero_col, 0, -1):
+            phase_goal[0][col] = phase_goal[0][col - 1]
+            phase_goal[0][col - 1] = 0
+        self._phase_goal = phase_goal
+        self._phase_targets = self._target_map(phase_goal)
+        self._goal_moves = "r" * zero_col + "d" * zero_row
+
+    def _target_map(self, grid):
+        """
+        helper function. maps every value to its position in grid
+        Returns a list of tuples of two integers
+        """
+        targets = [None] * (self._height * self._width)
+        for row in range(self._height):
+            for col in range(self._width):
+                assert targets[grid[row][col]] is None, "invalid goal"
+                targets[grid[row][col]] = (row, col)
+        return targets
+
+    def _key(self):
+        """
+        helper function. key of the puzzle for caches and tables
+        """
+        return (self._height, self._width, str(self), str(self._goal))
+
+    def _transpose_grid(self, grid):
+        """
+        helper function. mirrors grid in its main diagonal and relabels
+        value col + width * row as row + height * col
+        """
+        transposed = [[0 for dummy_row in range(self._height)]
+                      for dummy_col in range(self._width)]
+        for row in range(self._height):
+            for col in range(self._width):
+                value = grid[row][col]
+                transposed[col][row] = ((value % self._width) * self._height +
+                                        value // self._width)
+        return transposed
+
+    def _next_moves(self, last_move):
+        """
+        helper function. moves of the zero tile that stay on the grid
+        and do not revert last_move
+        """
+        moves = []
+        if self._zero_col > 0 and last_move != "r":
+            moves.append("l")
+        if self._zero_col < self._width - 1 and last_move != "l":
+            moves.append("r")
+        if self._zero_row > 0 and last_move != "d":
+            moves.append("u")
+        if self._zero_row < self._height - 1 and last_move != "u":
+            moves.append("d")
+        return moves
+
+    def _transpose_moves(self, move_string):
+        """
+        helper function. mirrors a move string in the main diagonal
+        """
+        return "".join([TRANSPOSED_MOVES[direction]
+                        for direction in move_string])
+
+    def _is_solvable(self):
+        """
+        helper function. every move swaps two values and moves the zero
+        tile one step, so the parity of the permutation must match the
+        parity of the zero tile's distance to its solved position
+        """
+        solved_indices = []
+        for row in range(self._height):
+            for col in range(self._width):
+                solved_row, solved_col = self._targets[self._grid[row][col]]
+                solved_indices.append(solved_col + self._width * solved_row)
+        inversions = 0
+        for index in range(len(solved_indices)):
+            for other in range(index + 1, len(solved_indices)):
+                if solved_indices[index] > solved_indices[other]:
+                    inversions += 1
+        zero_row, zero_col = self._targets[0]
+        return inversions % 2 == (abs(self._zero_row - zero_row) +
+                                  abs(self._zero_col - zero_col)) % 2
+
+    def _evaluate(self):
+        """
+        helper function. computes tile positions, encoding and heuristic
+        values from scratch, the moves keep them up to date incrementally
+        """
+        self._zero_row, self._zero_col = None, None
+        self._encoding = 0
+        self._positions = [None] * (self._height * self._width)
+        cells = []
+        for row in range(self._height):
+            for col in range(self._width):
+                value = self._grid[row][col]
+                cells.append(value)
+                if 0 <= value < len(self._positions):
+                    self._positions[value] = (row, col)
+                self._encoding |= value << (self._tile_bits *
+                                            (col + self._width * row))
+                if value == 0:
+                    self._zero_row, self._zero_col = row, col
+
+        heuristics = board_heuristics(cells, self._width, self._solved_rows,
+                                      self._solved_cols)
+        self._manhattan, self._row_conflicts, self._col_conflicts = heuristics
+        self._linear_conflict = (sum(self._row_conflicts) +
+                                 sum(self._col_conflicts))
+
+    def _slide_tile(self, tile_row, tile_col):
+        """
+        helper function. slides tile at (tile_row, tile_col) into the
+        adjacent zero tile, updates manhattan distance and the conflicts
+        of the only line that can change: the solved row or column of the tile
+        """
+        zero_row, zero_col = self._zero_row, self._zero_col
+        value = self._grid[tile_row][tile_col]
+        solved_row, solved_col = self._targets[value]
+
+        self._manhattan += (abs(zero_row - solved_row) +
+                            abs(zero_col - solved_col) -
+                            abs(tile_row - solved_row) -
+                            abs(tile_col - solved_col))
+
+        self._grid[zero_row][zero_col] = value
+        self._grid[tile_row][tile_col] = 0
+        self._zero_row, self._zero_col = tile_row, tile_col
+        self._positions[value] = (zero_row, zero_col)
+        self._positions[0] = (tile_row, tile_col)
+        self._encoding += ((value << (self._tile_bits *
+                                      (zero_col + self._width * zero_row))) -
+                           (value << (self._tile_bits *
+                                      (tile_col + self._width * tile_row))))
+
+        # vertical move: tile enters or leaves its solved row
+        if tile_col == zero_col and solved_row in (tile_row, zero_row):
+            conflict = self._row_conflict(solved_row)
+            self._linear_conflict += conflict - self._row_conflicts[solved_row]
+            self._row_conflicts[solved_row] = conflict
+
+        # horizontal move: tile enters or leaves its solved column
+        elif tile_row == zero_row and solved_col in (tile_col, zero_col):
+            conflict = self._col_conflict(solved_col)
+            self._linear_conflict += conflict - self._col_conflicts[solved_col]
+            self._col_conflicts[solved_col] = conflict
+
+    def _row_conflict(self, row):
+        """
+        helper function. linear conflict penalty of a single row
+        """
+        solved_cols = []
+        for col in range(self._width):
+            value = self._grid[row][col]
+            if value != 0 and self._targets[value][0] == row:
+                solved_cols.append(self._targets[value][1])
+        return _conflict_penalty(solved_cols)
+
+    def _col_conflict(self, col):
+        """
+        helper function. linear conflict penalty of a single column
+        """
+        solved_rows = []
+        for row in range(self._height):
+            value = self._grid[row][col]
+            if value != 0 and self._targets[value][1] == col:
+                solved_rows.append(self._targets[value][0])
+        return _conflict_penalty(solved_rows)
+
     def _zero_to_end(self):
         """
         moves zero to end
@@ -725,6 +1536,581 @@ class Puzzle:
 
         return result
 
+class StateStore:
+    """
+    Class representation for the boards of a best-first search: the seen
+    boards, packed encodings mapped to their cost and the move that
+    reached them, and the open list, encodings bucketed by estimate
+    """
+
+    def __init__(self, max_states):
+        """
+        Initialize an empty store holding at most max_states entries,
+        seen boards and open list entries together
+        Returns a StateStore object
+        """
+        self._max_states = max_states
+        self._states = {}
+        self._buckets = {}
+        self._open = 0
+        self._bound = 0
+
+    def get_size(self):
+        """
+        Getter for the number of entries in the store, seen boards and
+        open list entries together
+        Returns an integer
+        """
+        return len(self._states) + self._open
+
+    def has_state(self, encoding):
+        """
+        Check whether the board is in the store
+        Returns a boolean
+        """
+        return encoding in self._states
+
+    def add(self, encoding, cost, move):
+        """
+        Store or update the cost and last move (None for the start board)
+        of a board, both packed in a single integer
+        Returns False when a new board does not fit in the store
+        """
+        if encoding not in self._states:
+            if self.get_size() >= self._max_states:
+                return False
+        if move is None:
+            self._states[encoding] = cost * 5
+        else:
+            self._states[encoding] = cost * 5 + 1 + MOVES.index(move)
+        return True
+
+    def get_cost(self, encoding):
+        """
+        Getter for the cost of a stored board
+        Returns an integer
+        """
+        return self._states[encoding] // 5
+
+    def get_move(self, encoding):
+        """
+        Getter for the move that reached a stored board
+        Returns a string, None for the start board
+        """
+        move = self._states[encoding] % 5
+        if move == 0:
+            return None
+        return MOVES[move - 1]
+
+    def push(self, encoding, estimate):
+        """
+        Add a board to the open list with its estimated solution length
+        Returns False when it does not fit in the store
+        """
+        if self.get_size() >= self._max_states:
+            return False
+        if estimate not in self._buckets:
+            self._buckets[estimate] = []
+        self._buckets[estimate].append(encoding)
+        if self._open == 0 or estimate < self._bound:
+            self._bound = estimate
+        self._open += 1
+        return True
+
+    def pop(self):
+        """
+        Take the most recently pushed board with the smallest estimate
+        off the open list
+        Returns a tuple of the encoding and the estimate
+        """
+        assert self._open > 0, "open list is empty"
+        while not self._buckets.get(self._bound):
+            self._buckets.pop(self._bound, None)
+            self._bound += 1
+        self._open -= 1
+        return self._buckets[self._bound].pop(), self._bound
+
+
+class SolutionExporter:
+    """
+    Class representation for a compact replay stream of a solution: the
+    packed start board and goal, moves packed 2 bits each and a keyframe
+    with the packed board every keyframe_interval moves for seeking
+    """
+
+    def __init__(self, puzzle, write=None, keyframe_interval=KEYFRAME_INTERVAL):
+        """
+        Start a stream at the current board of puzzle. Records are tuples
+        handed to write as soon as they are complete, by default they are
+        collected in a list
+        Returns a SolutionExporter object
+        """
+        self._records = []
+        if write is None:
+            write = self._records.append
+        self._write = write
+        self._keyframe_interval = keyframe_interval
+        self._board = puzzle.clone()
+        self._steps = 0
+        self._chunk = 0
+        self._chunk_size = 0
+        goal = Puzzle(puzzle.get_height(), puzzle.get_width(),
+                      puzzle.get_goal(), puzzle.get_goal())
+        self._write(("start", puzzle.get_height(), puzzle.get_width(),
+                     puzzle.get_encoding(), goal.get_encoding()))
+
+    def get_records(self):
+        """
+        Getter for the records collected when no write function is given
+        Returns a list of tuples
+        """
+        return self._records
+
+    def record(self, move_string):
+        """
+        Append the moves of move_string to the stream
+        """
+        for direction in move_string:
+            self._chunk |= MOVES.index(direction) << (2 * self._chunk_size)
+            self._chunk_size += 1
+            self._steps += 1
+            self._board.update_puzzle(direction)
+            if self._chunk_size == self._keyframe_interval:
+                self._flush()
+                self._write(("keyframe", self._steps,
+                             self._board.get_encoding()))
+
+    def finish(self):
+        """
+        Write the pending moves and close the stream
+        """
+        self._flush()
+        self._write(("end", self._steps))
+
+    def _flush(self):
+        """
+        helper function. writes the pending moves as one record
+        """
+        if self._chunk_size > 0:
+            self._write(("moves", self._chunk_size, self._chunk))
+            self._chunk = 0
+            self._chunk_size = 0
+
+
+def load_frame(records, step):
+    """
+    Rebuild the board after the given number of moves of a stream written
+    by SolutionExporter, replaying from the last keyframe before it
+    Returns a Puzzle object with the goal of the stream
+    """
+    # unpack the goal
+    dummy_kind, height, width, encoding, goal_encoding = records[0]
+    goal = Puzzle(height, width)
+    goal.set_encoding(goal_encoding)
+    goal_grid = [[goal.get_number(row, col) for col in range(width)]
+                 for row in range(height)]
+
+    # find the last keyframe at or before step
+    start_index, steps = 1, 0
+    for index in range(1, len(records)):
+        if records[index][0] == "keyframe" and records[index][1] <= step:
+            dummy_kind, steps, encoding = records[index]
+            start_index = index + 1
+
+    puzzle = Puzzle(height, width, None, goal_grid)
+    puzzle.set_encoding(encoding)
+    for index in range(start_index, len(records)):
+        if steps == step:
+            break
+        if records[index][0] == "moves":
+            dummy_kind, count, chunk = records[index]
+            moves = ""
+            while count > 0 and steps < step:
+                moves += MOVES[chunk & 3]
+                chunk >>= 2
+                count -= 1
+                steps += 1
+            puzzle.update_puzzle(moves)
+
+    assert steps == step, "step beyond the end of the stream"
+    return puzzle
+
+
+###########################################################
+# Flat board functions, replaced by puzzle_accel where it is built
+
+def apply_moves(cells, puzzle_width, move_string):
+    """
+    Apply move_string to a board stored row by row in the flat list
+    cells, up to the first invalid direction or move off the grid
+    Updates cells and returns the number of moves applied
+    """
+    if puzzle_accel is not None:
+        return puzzle_accel.apply_moves(cells, puzzle_width, move_string)
+
+    neighbors = _neighbor_table(len(cells) // puzzle_width, puzzle_width)
+    zero = cells.index(0)
+    for index in range(len(move_string)):
+        target = neighbors[zero].get(move_string[index])
+        if target is None:
+            return index
+        cells[zero] = cells[target]
+        cells[target] = 0
+        zero = target
+    return len(move_string)
+
+def board_heuristics(cells, puzzle_width, solved_rows, solved_cols):
+    """
+    Compute the manhattan distance and the linear conflict penalties of
+    a board stored row by row in cells, value v is solved at
+    (solved_rows[v], solved_cols[v]). The zero tile is not counted
+    Returns a tuple of the distance, the row penalties and the column
+    penalties
+    """
+    if puzzle_accel is not None:
+        return puzzle_accel.board_heuristics(cells, puzzle_width,
+                                             solved_rows, solved_cols)
+
+    puzzle_height = len(cells) // puzzle_width
+    manhattan = 0
+    row_lines = [[] for dummy_row in range(puzzle_height)]
+    col_lines = [[] for dummy_col in range(puzzle_width)]
+    for position in range(len(cells)):
+        value = cells[position]
+        if value != 0:
+            row, col = position // puzzle_width, position % puzzle_width
+            manhattan += (abs(row - solved_rows[value]) +
+                          abs(col - solved_cols[value]))
+            if solved_rows[value] == row:
+                row_lines[row].append(solved_cols[value])
+            if solved_cols[value] == col:
+                col_lines[col].append(solved_rows[value])
+    return (manhattan, [_conflict_penalty(line) for line in row_lines],
+            [_conflict_penalty(line) for line in col_lines])
+
+def _neighbor_table(puzzle_height, puzzle_width):
+    """
+    helper function. maps the direction of every move to the position the
+    zero tile moves to, for each position, built once per puzzle size
+    Returns a list of dictionaries
+    """
+    size = (puzzle_height, puzzle_width)
+    if size in NEIGHBOR_TABLES:
+        return NEIGHBOR_TABLES[size]
+
+    neighbors = []
+    for position in range(puzzle_height * puzzle_width):
+        row, col = position // puzzle_width, position % puzzle_width
+        moves = {}
+        for direction in MOVES:
+            offset_row, offset_col = MOVE_OFFSETS[direction]
+            if (0 <= row + offset_row < puzzle_height and
+                    0 <= col + offset_col < puzzle_width):
+                moves[direction] = position + offset_col + puzzle_width * offset_row
+        neighbors.append(moves)
+
+    NEIGHBOR_TABLES[size] = neighbors
+    return neighbors
+
+def _conflict_penalty(line):
+    """
+    helper function. takes the solved positions of the tiles in a line,
+    in their current order. Every tile outside the longest increasing
+    subsequence has to leave the line, costing two extra moves
+    """
+    longest = [1] * len(line)
+    for index in range(len(line)):
+        for prev in range(index):
+            if line[prev] < line[index] and longest[prev] + 1 > longest[index]:
+                longest[index] = longest[prev] + 1
+    if not longest:
+        return 0
+    return 2 * (len(line) - max(longest))
+
+
+###########################################################
+# Worker process functions
+
+def _open_pool(processes, height, width, grid, goal_grid):
+    """
+    helper function. starts processes workers sharing a solved flag, each
+    one gets the board to solve once, the tasks only carry a subtree
+    Returns a process pool, None when processes <= 1 or processes are
+    not available
+    """
+    if processes <= 1 or multiprocessing is None:
+        return None
+    try:
+        solved = multiprocessing.Value("b", 0)
+        pool = multiprocessing.Pool(processes, _init_worker,
+                                    (solved, height, width, grid, goal_grid))
+    except (ImportError, OSError):
+        return None
+    WORKER_STATE["solved"] = solved
+    return pool
+
+def _init_worker(solved, height, width, grid, goal_grid):
+    """
+    helper function. keeps the shared solved flag and the board to solve
+    in a worker process
+    """
+    WORKER_STATE["solved"] = solved
+    WORKER_STATE["puzzle"] = Puzzle(height, width, grid, goal_grid)
+    WORKER_STATE["root"] = WORKER_STATE["puzzle"].get_encoding()
+
+def _search_worker(task):
+    """
+    helper function. searches one subtree of solve_optimal in a worker,
+    starting from the board the worker was given
+    Returns the result of Puzzle._search_subtree
+    """
+    prefix, bound = task
+    puzzle = WORKER_STATE["puzzle"]
+    puzzle.set_encoding(WORKER_STATE["root"])
+    return puzzle._search_subtree(prefix, bound)
+
+
+###########################################################
+# Batch functions
+
+def verify_solutions(puzzle_height, puzzle_width, grids, move_strings,
+                     goal_grid=None):
+    """
+    Replay every move string on the grid with the same index and check
+    that it ends in the solved configuration (goal_grid, as for Puzzle).
+    Grids are replayed on flat lists, no Puzzle objects are built
+    Returns a list of (index, move index, message) tuples, one per
+    failure. The move index is the offending move, or the length of the
+    move string when all moves are valid but the puzzle is not solved
+    """
+    size = puzzle_height * puzzle_width
+    solved = list(range(size))
+    if goal_grid is not None:
+        solved = []
+        for row in goal_grid:
+            solved.extend(row)
+
+    failures = []
+    for index in range(len(grids)):
+        cells = []
+        for row in grids[index]:
+            cells.extend(row)
+        move_string = move_strings[index]
+
+        failure = None
+        move_index = apply_moves(cells, puzzle_width, move_string)
+        if move_index < len(move_string):
+            direction = move_string[move_index]
+            if direction in INVERSE_MOVES:
+                failure = (index, move_index, "move off grid: " + direction)
+            else:
+                failure = (index, move_index, "invalid direction: " + direction)
+
+        if failure is None and cells != solved:
+            failure = (index, len(move_string), "puzzle not solved")
+        if failure is not None:
+            failures.append(failure)
+    return failures
+
+def rate_boards(puzzle_height, puzzle_width, grids, with_upper=True,
+                goal_grid=None):
+    """
+    Estimate the difficulty of many puzzles of the same size and goal
+    Returns a list of (lower bound, upper bound) tuples, the upper bound
+    is None when with_upper is False
+    """
+    if with_upper or puzzle_height * puzzle_width <= 6:
+        ratings = []
+        for grid in grids:
+            puzzle = Puzzle(puzzle_height, puzzle_width, grid, goal_grid)
+            lower = puzzle.lower_bound()
+            upper = None
+            if with_upper:
+                upper = puzzle.upper_bound()
+            ratings.append((lower, upper))
+        return ratings
+
+    # lower bounds only: manhattan distance plus linear conflict straight
+    # from the grids, the goal tables are built once. The zero tile is
+    # in no solved row or column
+    size = puzzle_height * puzzle_width
+    goal = Puzzle(puzzle_height, puzzle_width, None, goal_grid)
+    solved_rows, solved_cols = [-1] * size, [-1] * size
+    for row in range(puzzle_height):
+        for col in range(puzzle_width):
+            value = goal.get_number(row, col)
+            if value != 0:
+                solved_rows[value], solved_cols[value] = row, col
+
+    ratings = []
+    if puzzle_accel is not None:
+        for grid in grids:
+            cells = []
+            for row in grid:
+                cells.extend(row)
+            manhattan, row_conflicts, col_conflicts = board_heuristics(
+                cells, puzzle_width, solved_rows, solved_cols)
+            ratings.append((manhattan + sum(row_conflicts) +
+                            sum(col_conflicts), None))
+        return ratings
+
+    # manhattan distance of each value at each position in row major order
+    distances = [[0] * size for dummy_value in range(size)]
+    for value in range(1, size):
+        for position in range(size):
+            distances[value][position] = (
+                abs(position // puzzle_width - solved_rows[value]) +
+                abs(position % puzzle_width - solved_cols[value]))
+
+    for grid in grids:
+        lower = 0
+        position = 0
+        for row in range(puzzle_height):
+            line = []
+            for value in grid[row]:
+                lower += distances[value][position]
+                position += 1
+                if solved_rows[value] == row:
+                    line.append(solved_cols[value])
+            if len(line) > 1:
+                lower += _conflict_penalty(line)
+        for col in range(puzzle_width):
+            line = []
+            for cells in grid:
+                if solved_cols[cells[col]] == col:
+                    line.append(solved_rows[cells[col]])
+            if len(line) > 1:
+                lower += _conflict_penalty(line)
+        ratings.append((lower, None))
+    return ratings
+
+class CheckpointFile:
+    """
+    Class representation for an append-only checkpoint of solve_batch
+    backed by a file, one line each. Every line is written with its
+    newline, flushed and synced before append returns, so a crash can
+    only cut off the last line, which is dropped when the file is opened
+    """
+
+    def __init__(self, path):
+        """
+        Open the checkpoint at path, creating it if needed, and cut off a
+        last line that has no newline
+        Returns a CheckpointFile object
+        """
+        data = b""
+        if os.path.exists(path):
+            with open(path, "rb") as stored:
+                data = stored.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            with open(path, "r+b") as stored:
+                stored.truncate(complete)
+        self._lines = data[:complete].decode("utf-8").splitlines()
+        self._file = open(path, "ab")
+
+    def __len__(self):
+        """
+        Getter for the number of lines
+        Returns an integer
+        """
+        return len(self._lines)
+
+    def __getitem__(self, index):
+        """
+        Getter for the line at index
+        Returns a string
+        """
+        return self._lines[index]
+
+    def __iter__(self):
+        """
+        Iterate over the lines
+        Returns an iterator of strings
+        """
+        return iter(self._lines)
+
+    def append(self, line):
+        """
+        Write line to the file and sync it to disk
+        """
+        self._file.write((line + "\n").encode("utf-8"))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._lines.append(line)
+
+    def close(self):
+        """
+        Close the file
+        """
+        self._file.close()
+
+
+def solve_batch(puzzle_height, puzzle_width, boards, checkpoint,
+                shard_size=1000, write_shard=None, goal_grid=None):
+    """
+    Solve (board id, grid) pairs with solve_puzzle, resuming after a
+    crash. checkpoint is an append-only list of lines, a CheckpointFile to
+    keep it on disk: "id:moves" for each solved board and "#shard n" once
+    shard n is written. Boards already in the checkpoint are skipped and
+    results not yet written to a shard are carried over. Every shard_size
+    results are passed to write_shard(shard index, results)
+    Returns the list of shards written by this call
+    """
+    # replay the checkpoint. Result lines always hold a colon, shard
+    # marks never, so no board id reads as a mark. A crash while a line
+    # is appended can cut it off: lines that are neither result nor
+    # shard mark are skipped, the board of a last result line is solved
+    # again and a later result of a board replaces the earlier one
+    done = set()
+    pending = []
+    shard_index = 0
+    for line in checkpoint:
+        if ":" in line:
+            board_id, moves = line.rsplit(":", 1)
+            if board_id in done:
+                pending = [result for result in pending
+                           if result[0] != board_id]
+            done.add(board_id)
+            pending.append((board_id, moves))
+        elif line.startswith("#shard "):
+            shard_index += 1
+            pending = []
+    if pending and ":" in checkpoint[-1]:
+        done.discard(pending.pop()[0])
+
+    shards = []
+    if write_shard is None:
+        write_shard = lambda index, results: shards.append(results)
+
+    # a crash after the last result of a shard leaves it full but unwritten
+    while len(pending) >= shard_size:
+        write_shard(shard_index, pending[:shard_size])
+        checkpoint.append("#shard " + str(shard_index))
+        shard_index += 1
+        pending = pending[shard_size:]
+
+    for board_id, grid in boards:
+        board_id = str(board_id)
+        if board_id in done:
+            continue
+        moves = Puzzle(puzzle_height, puzzle_width, grid,
+                       goal_grid).solve_puzzle()
+        checkpoint.append(board_id + ":" + moves)
+        done.add(board_id)
+        pending.append((board_id, moves))
+
+        if len(pending) == shard_size:
+            write_shard(shard_index, pending)
+            checkpoint.append("#shard " + str(shard_index))
+            shard_index += 1
+            pending = []
+
+    if pending:
+        write_shard(shard_index, pending)
+        checkpoint.append("#shard " + str(shard_index))
+    return shards
+
 # Start interactive simulation
 puzzle = Puzzle(4, 4, [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11], [12, 13, 14, 15]])
 poc_fifteen_gui.FifteenGUI(puzzle)
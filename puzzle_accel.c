@@ -0,0 +1,227 @@
+/*
+ * Optional compiled versions of the flat board functions of puzzle.py:
+ * apply_moves and board_heuristics. puzzle.py uses them when this module
+ * is importable and falls back to its pure-Python functions otherwise,
+ * those stay the reference for the results.
+ *
+ * Build next to puzzle.py with the setuptools extension in setup.py:
+ *     python setup.py build_ext --inplace
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+/* copy a sequence of integers in [0, size) into values */
+static int
+read_values(PyObject *fast, long *values, Py_ssize_t size)
+{
+    Py_ssize_t index;
+    for (index = 0; index < size; index++) {
+        long value = PyLong_AsLong(PySequence_Fast_GET_ITEM(fast, index));
+        if (value == -1 && PyErr_Occurred())
+            return -1;
+        values[index] = value;
+    }
+    return 0;
+}
+
+/* linear conflict penalty of the solved positions of the tiles in a line */
+static long
+conflict_penalty(const long *line, Py_ssize_t length, long *longest)
+{
+    Py_ssize_t index, prev;
+    long best = 0;
+    for (index = 0; index < length; index++) {
+        longest[index] = 1;
+        for (prev = 0; prev < index; prev++) {
+            if (line[prev] < line[index] && longest[prev] + 1 > longest[index])
+                longest[index] = longest[prev] + 1;
+        }
+        if (longest[index] > best)
+            best = longest[index];
+    }
+    return 2 * (length - best);
+}
+
+static PyObject *
+apply_moves(PyObject *self, PyObject *args)
+{
+    PyObject *cells;
+    Py_ssize_t width, height, size, length, index, zero, row, col;
+    const char *moves;
+    long *values;
+
+    if (!PyArg_ParseTuple(args, "O!ns#", &PyList_Type, &cells, &width,
+                          &moves, &length))
+        return NULL;
+    size = PyList_GET_SIZE(cells);
+    if (width <= 0 || size % width != 0) {
+        PyErr_SetString(PyExc_ValueError, "cells do not fill the rows");
+        return NULL;
+    }
+    height = size / width;
+
+    values = PyMem_New(long, size + 1);
+    if (values == NULL)
+        return PyErr_NoMemory();
+    zero = -1;
+    for (index = 0; index < size; index++) {
+        values[index] = PyLong_AsLong(PyList_GET_ITEM(cells, index));
+        if (values[index] == -1 && PyErr_Occurred()) {
+            PyMem_Free(values);
+            return NULL;
+        }
+        if (values[index] == 0 && zero < 0)
+            zero = index;
+    }
+    if (zero < 0) {
+        PyMem_Free(values);
+        PyErr_SetString(PyExc_ValueError, "no zero tile");
+        return NULL;
+    }
+
+    row = zero / width;
+    col = zero % width;
+    for (index = 0; index < length; index++) {
+        Py_ssize_t target;
+        switch (moves[index]) {
+        case 'l': col--; break;
+        case 'r': col++; break;
+        case 'u': row--; break;
+        case 'd': row++; break;
+        default: goto done;
+        }
+        if (row < 0 || row >= height || col < 0 || col >= width)
+            break;
+        target = col + width * row;
+        values[zero] = values[target];
+        values[target] = 0;
+        zero = target;
+    }
+
+done:
+    for (row = 0; row < size; row++) {
+        PyObject *value = PyLong_FromLong(values[row]);
+        if (value == NULL) {
+            PyMem_Free(values);
+            return NULL;
+        }
+        PyList_SetItem(cells, row, value);
+    }
+    PyMem_Free(values);
+    return PyLong_FromSsize_t(index);
+}
+
+static PyObject *
+board_heuristics(PyObject *self, PyObject *args)
+{
+    PyObject *cells_arg, *rows_arg, *cols_arg;
+    PyObject *cells = NULL, *rows_fast = NULL, *cols_fast = NULL;
+    PyObject *row_conflicts = NULL, *col_conflicts = NULL, *result = NULL;
+    PyObject *penalty;
+    Py_ssize_t width, height, size, index, row, col, length;
+    long *values = NULL, *solved_rows, *solved_cols, *line, *longest;
+    long manhattan = 0;
+
+    if (!PyArg_ParseTuple(args, "OnOO", &cells_arg, &width, &rows_arg,
+                          &cols_arg))
+        return NULL;
+    cells = PySequence_Fast(cells_arg, "cells must be a sequence");
+    rows_fast = PySequence_Fast(rows_arg, "solved_rows must be a sequence");
+    cols_fast = PySequence_Fast(cols_arg, "solved_cols must be a sequence");
+    if (cells == NULL || rows_fast == NULL || cols_fast == NULL)
+        goto finally;
+
+    size = PySequence_Fast_GET_SIZE(cells);
+    if (width <= 0 || size % width != 0 ||
+        PySequence_Fast_GET_SIZE(rows_fast) != size ||
+        PySequence_Fast_GET_SIZE(cols_fast) != size) {
+        PyErr_SetString(PyExc_ValueError, "sizes do not match");
+        goto finally;
+    }
+    height = size / width;
+
+    values = PyMem_New(long, 5 * size + 1);
+    if (values == NULL) {
+        PyErr_NoMemory();
+        goto finally;
+    }
+    solved_rows = values + size;
+    solved_cols = solved_rows + size;
+    line = solved_cols + size;
+    longest = line + size;
+    if (read_values(cells, values, size) < 0 ||
+        read_values(rows_fast, solved_rows, size) < 0 ||
+        read_values(cols_fast, solved_cols, size) < 0)
+        goto finally;
+    for (index = 0; index < size; index++) {
+        if (values[index] < 0 || values[index] >= size) {
+            PyErr_SetString(PyExc_ValueError, "value out of range");
+            goto finally;
+        }
+        if (values[index] != 0) {
+            long value = values[index];
+            manhattan += labs((long)(index / width) - solved_rows[value]) +
+                         labs((long)(index % width) - solved_cols[value]);
+        }
+    }
+
+    row_conflicts = PyList_New(height);
+    col_conflicts = PyList_New(width);
+    if (row_conflicts == NULL || col_conflicts == NULL)
+        goto finally;
+    for (row = 0; row < height; row++) {
+        length = 0;
+        for (col = 0; col < width; col++) {
+            long value = values[col + width * row];
+            if (value != 0 && solved_rows[value] == row)
+                line[length++] = solved_cols[value];
+        }
+        penalty = PyLong_FromLong(conflict_penalty(line, length, longest));
+        if (penalty == NULL)
+            goto finally;
+        PyList_SET_ITEM(row_conflicts, row, penalty);
+    }
+    for (col = 0; col < width; col++) {
+        length = 0;
+        for (row = 0; row < height; row++) {
+            long value = values[col + width * row];
+            if (value != 0 && solved_cols[value] == col)
+                line[length++] = solved_rows[value];
+        }
+        penalty = PyLong_FromLong(conflict_penalty(line, length, longest));
+        if (penalty == NULL)
+            goto finally;
+        PyList_SET_ITEM(col_conflicts, col, penalty);
+    }
+    result = Py_BuildValue("lOO", manhattan, row_conflicts, col_conflicts);
+
+finally:
+    PyMem_Free(values);
+    Py_XDECREF(cells);
+    Py_XDECREF(rows_fast);
+    Py_XDECREF(cols_fast);
+    Py_XDECREF(row_conflicts);
+    Py_XDECREF(col_conflicts);
+    return result;
+}
+
+static PyMethodDef puzzle_accel_methods[] = {
+    {"apply_moves", apply_moves, METH_VARARGS,
+     "apply_moves(cells, puzzle_width, move_string) -> moves applied"},
+    {"board_heuristics", board_heuristics, METH_VARARGS,
+     "board_heuristics(cells, puzzle_width, solved_rows, solved_cols) -> "
+     "(manhattan, row conflicts, column conflicts)"},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef puzzle_accel_module = {
+    PyModuleDef_HEAD_INIT, "puzzle_accel",
+    "Compiled flat board functions of puzzle.py", -1, puzzle_accel_methods
+};
+
+PyMODINIT_FUNC
+PyInit_puzzle_accel(void)
+{
+    return PyModule_Create(&puzzle_accel_module);
+}
@@ -0,0 +1,9 @@
+"""
+Builds the optional puzzle_accel C module next to puzzle.py:
+    python setup.py build_ext --inplace
+"""
+
+from setuptools import setup, Extension
+
+setup(name="puzzle_accel",
+      ext_modules=[Extension("puzzle_accel", ["puzzle_accel.c"])])
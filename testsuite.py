@@ -1,9 +1,50 @@
 """
 A simple testing suite for Fifteen Puzzle
 """
+import time
 import poc_simpletest
+
+# checkpoint files of solve_batch, CodeSkulptor has no tempfile module
+try:
+    import tempfile
+except ImportError:
+    tempfile = None
 import user37_wBv4xkHaMMDFxyD_7 as mycode
 
+# scrambled puzzles for solve_puzzle: height, width, grid and the longest
+# accepted solution. A better solver may only lower these ceilings
+CORPUS = [
+    (2, 2, [[2,1],[3,0]], 2),
+    (2, 3, [[5,4,3],[2,0,1]], 16),
+    (4, 2, [[0,5],[3,2],[1,6],[4,7]], 40),
+    (3, 3, [[2,4,0],[3,1,5],[6,7,8]], 22),
+    (3, 3, [[8,7,6],[5,4,3],[2,1,0]], 68),
+    (3, 4, [[1,7,5,11],[8,10,2,3],[4,6,0,9]], 94),
+    (4, 4, [[4,6,1,3],[5,2,0,7],[8,9,10,11],[12,13,14,15]], 39),
+    (4, 4, [[14,2,7,12],[8,4,6,3],[1,9,10,0],[13,5,15,11]], 171),
+    (4, 4, [[4,11,1,3],[12,0,5,2],[13,6,9,7],[14,10,8,15]], 128),
+    (3, 5, [[0,3,14,4,8],[1,5,7,10,13],[6,9,12,2,11]], 148),
+    (5, 5, [[2,13,0,9,16],[4,17,3,11,18],[5,8,6,23,19],[1,12,7,21,14],[10,15,20,22,24]], 352),
+]
+
+# longest accepted solve_puzzle time in seconds, per puzzle size
+TIME_LIMITS = {(2, 2): 1.0, (2, 3): 1.0, (4, 2): 1.0, (3, 3): 1.0,
+               (3, 4): 2.0, (4, 4): 2.0, (3, 5): 2.0, (5, 5): 5.0}
+
+def check_moves(suite, puzzle, solve, solved, max_moves, message):
+    """
+    Runs solve on puzzle, which must then pass the check solved, and
+    replays the returned move string on a clone of the original puzzle.
+    It must reach the same board in at most max_moves moves, the move
+    string itself may change
+    """
+    original = puzzle.clone()
+    move_string = solve(puzzle)
+    suite.run_test(solved(puzzle), True, message + " solved")
+    original.update_puzzle(move_string)
+    suite.run_test(str(original), str(puzzle), message + " replay")
+    suite.run_test(len(move_string) <= max_moves, True, message + " length")
+
 def run_test_lower_row_invariant():
     """
     Tests for verifying Puzzle method lower_row_invariant
@@ -43,29 +84,29 @@ def run_test_solve_interior_tile():
     
     #test 1, 3x3, target_tile 8 above zero_tile
     puzzle = mycode.Puzzle(3, 3, [[4,3,8], [1,2,5], [6,7,0]])
-    suite.run_test(puzzle.solve_interior_tile(2,2), "uulddruld", "test1, solve_interior_tile, 3x3")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_interior_tile(2,2), lambda puzzle: puzzle.lower_row_invariant(2, 1), 9, "test1, solve_interior_tile, 3x3")
     #print puzzle # updated puzzle [[4,2,3], [1,2,7], [6,0,8]]
     
     #test 2, 3x3, target_tile 8 above zero_tile
     puzzle = mycode.Puzzle(3, 3, [[4,3,1], [8,2,5], [6,7,0]])
-    suite.run_test(puzzle.solve_interior_tile(2,2), "ullurrdldruld", "test2, solve_interior_tile, 3x3")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_interior_tile(2,2), lambda puzzle: puzzle.lower_row_invariant(2, 1), 13, "test2, solve_interior_tile, 3x3")
     #print puzzle # updated puzzle [[4,3,1], [6,2,5], [7,0,8]]
     
     #test 3, 4x4, target_tile 13 above zero_tile
     puzzle = mycode.Puzzle(4, 4, [[4,13,1,3], [5,10,2,7], [8,12,6,11], [9,0,14,15]])
-    suite.run_test(puzzle.solve_interior_tile(3,1), "uuulddrulddruld", "test3, solve_interior_tile, 4x4")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_interior_tile(3,1), lambda puzzle: puzzle.lower_row_invariant(3, 0), 15, "test3, solve_interior_tile, 4x4")
     
     #test 4, 3x3, target_tile above zero
     puzzle = mycode.Puzzle(3, 3, [[2,4,5], [3,1,8], [6,7,0]])
-    suite.run_test(puzzle.solve_interior_tile(2,2), "uld", "test4, solve_interior_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_interior_tile(2,2), lambda puzzle: puzzle.lower_row_invariant(2, 1), 3, "test4, solve_interior_tile")
     
     #test5, 3x3, target top left
     puzzle = mycode.Puzzle(3, 3, [[8, 7, 6], [5, 4, 3], [2, 1, 0]])
-    suite.run_test(puzzle.solve_interior_tile(2,2), "ululdrruldrulddruld", "test5 solve_interior_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_interior_tile(2,2), lambda puzzle: puzzle.lower_row_invariant(2, 1), 19, "test5 solve_interior_tile")
     
     #test6, 3x3, target top left
     puzzle = mycode.Puzzle(3, 3, [[7, 5, 6], [2, 4, 3], [1, 0, 8]])
-    suite.run_test(puzzle.solve_interior_tile(2,1), "ulurdldruld", "test6 solve_interior_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_interior_tile(2,1), lambda puzzle: puzzle.lower_row_invariant(2, 0), 11, "test6 solve_interior_tile")
     
     # report number of tests and failures
     suite.report_results()    
@@ -79,27 +120,27 @@ def run_test_solve_col0_tile():
 
     #test 1, 3x3, target_tile right of zero tile
     puzzle = mycode.Puzzle(3, 3, [[1,2,6],[3,4,5],[0,7,8]])
-    suite.run_test(puzzle.solve_col0_tile(2), "ururldruldrulldruldrdlurdluurddlurr", "test1, solve_col0_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_col0_tile(2), lambda puzzle: puzzle.lower_row_invariant(1, 2), 35, "test1, solve_col0_tile")
     #print puzzle #step3: [[4,3,5],[1,2,0][6,7,8]])
     
     #test 2, 3x3, target_tile above zero tile
     puzzle = mycode.Puzzle(3, 3, [[6,2,1],[3,4,5],[0,7,8]])
-    suite.run_test(puzzle.solve_col0_tile(2), "uurdlruldrdlurdluurddlurr", "test2, solve_col0_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_col0_tile(2), lambda puzzle: puzzle.lower_row_invariant(1, 2), 25, "test2, solve_col0_tile")
     #print puzzle #step3: [[2,3,1],[4,5,0][6,7,8]])
 
     #test 3, 4x4, lucky: target_tile in place after step 1 of solution strategy
     puzzle = mycode.Puzzle(4, 4, [[5,4,1,3],[10,8,2,7],[12,9,6,11],[0,13,14,15]])
-    suite.run_test(puzzle.solve_col0_tile(3), "urrr", "test2, solve_col0_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_col0_tile(3), lambda puzzle: puzzle.lower_row_invariant(2, 3), 4, "test2, solve_col0_tile")
     #print puzzle
     
     #test 4, 4x4, target tile right of zero tile
     puzzle = mycode.Puzzle(4, 4, [[12,4,1,3],[10,8,2,7],[5,9,6,11],[0,13,14,15]])
-    suite.run_test(puzzle.solve_col0_tile(3), "uuurdldruldruldrdlurdluurddlurrr", "test4, solve_col0_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_col0_tile(3), lambda puzzle: puzzle.lower_row_invariant(2, 3), 32, "test4, solve_col0_tile")
     #print puzzle
     
     #test 5, 4x4, target tile above zero tile
     puzzle = mycode.Puzzle(4, 4, [[3,4,1,12],[10,8,2,7],[5,9,6,11],[0,13,14,15]])
-    suite.run_test(puzzle.solve_col0_tile(3), "urururldruldrullddruldrulldruldrdlurdluurddlurrr", "test5, solve_col0_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_col0_tile(3), lambda puzzle: puzzle.lower_row_invariant(2, 3), 48, "test5, solve_col0_tile")
     #print puzzle
     
     # report number of tests and failures
@@ -142,11 +183,11 @@ def run_test_solve_row1_tile():
     
     #test1
     puzzle = mycode.Puzzle(4, 4, [[4,6,1,3],[5,2,0,7],[8,9,10,11],[12,13,14,15]])
-    suite.run_test(puzzle.solve_row1_tile(2), "uldruldur", "test1 solve_row1_tile.")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_row1_tile(2), lambda puzzle: puzzle.row0_invariant(2), 9, "test1 solve_row1_tile.")
     
     #test2
     puzzle = mycode.Puzzle(3, 3, [[2,4,5],[3,1,0],[6,7,8]])
-    suite.run_test(puzzle.solve_row1_tile(2), "u", "test2 solve_row1_tile.")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_row1_tile(2), lambda puzzle: puzzle.row0_invariant(2), 1, "test2 solve_row1_tile.")
     
     # report number of tests and failures
     suite.report_results()
@@ -160,27 +201,27 @@ def run_test_solve_row0_tile():
     
     #test 1: 3x3 board
     puzzle = mycode.Puzzle(3, 3, [[3,4,0],[2,1,5],[6,7,8]])
-    suite.run_test(puzzle.solve_row0_tile(2), "ldlurdlurrdluldrruld", "test1 solve_row0_tile") 
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_row0_tile(2), lambda puzzle: puzzle.row1_invariant(1), 20, "test1 solve_row0_tile") 
 
     #test 2: 3x3 board
     puzzle = mycode.Puzzle(3, 3, [[2,4,0],[3,1,5],[6,7,8]])
-    suite.run_test(puzzle.solve_row0_tile(2), "lduldruldurdlurrdluldrruld", "test2 solve_row0_tile")     
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_row0_tile(2), lambda puzzle: puzzle.row1_invariant(1), 26, "test2 solve_row0_tile")     
     
     #test 3: 4x4 board, target at (0,2)
     puzzle = mycode.Puzzle(4, 4, [[6,1,3,0],[4,5,2,7],[8,9,10,11],[12,13,14,15]])
-    suite.run_test(puzzle.solve_row0_tile(3), "ld", "test3 solve_row0_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_row0_tile(3), lambda puzzle: puzzle.row1_invariant(2), 2, "test3 solve_row0_tile")
     
     #test 4: 4x4 board, target at (1,2)
     puzzle = mycode.Puzzle(4, 4, [[6,1,2,0],[4,5,3,7],[8,9,10,11],[12,13,14,15]])
-    suite.run_test(puzzle.solve_row0_tile(3), "lduldurdlurrdluldrruld", "test4 solve_row0_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_row0_tile(3), lambda puzzle: puzzle.row1_invariant(2), 22, "test4 solve_row0_tile")
     
     #test 5: 4x4 board, target at (0,0)
     puzzle = mycode.Puzzle(4, 4, [[3,6,1,0],[4,5,2,7],[8,9,10,11],[12,13,14,15]])
-    suite.run_test(puzzle.solve_row0_tile(3), "ldulldruldurrdlurdlurrdluldrruld", "test5 solve_row0_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_row0_tile(3), lambda puzzle: puzzle.row1_invariant(2), 32, "test5 solve_row0_tile")
     
     #test 6: 4x4 board, target at (1,0)
     puzzle = mycode.Puzzle(4, 4, [[4,6,1,0],[3,5,2,7],[8,9,10,11],[12,13,14,15]])
-    suite.run_test(puzzle.solve_row0_tile(3), "ldllurrdlurdlurrdluldrruld", "test5 solve_row0_tile")
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_row0_tile(3), lambda puzzle: puzzle.row1_invariant(2), 26, "test5 solve_row0_tile")
     
     # report number of tests and failures
     suite.report_results()
@@ -194,49 +235,565 @@ def run_test_solve_2x2():
     
     #test 1: 2x2 board, solvable, homework question 4
     puzzle = mycode.Puzzle(2, 2, [[2,1],[3,0]])
-    suite.run_test(puzzle.solve_2x2(), "lu", "test1 solve_2x2") 
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_2x2(), lambda puzzle: puzzle.lower_row_invariant(0, 0), 2, "test1 solve_2x2") 
     
     #test 2: 2x2 board, solvable, homework question 5
     puzzle = mycode.Puzzle(2, 2, [[3,2],[1,0]])
-    suite.run_test(puzzle.solve_2x2(), "lurdlu", "test2 solve_2x2") 
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_2x2(), lambda puzzle: puzzle.lower_row_invariant(0, 0), 6, "test2 solve_2x2") 
     
     # report number of tests and failures
     suite.report_results()
 
+def run_test_solve_2x3():
+    """
+    Tests for verifying Puzzle methods solve_2x3 and solve_3x2
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    #test 1: 2x3 board, 3 moves is optimal
+    puzzle = mycode.Puzzle(2, 3, [[1,2,5],[3,4,0]])
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_2x3(), lambda puzzle: puzzle.lower_row_invariant(0, 0), 3, "test1 solve_2x3")
+
+    #test 2: 2x3 board, 17 moves is optimal
+    puzzle = mycode.Puzzle(2, 3, [[4,2,1],[3,5,0]])
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_2x3(), lambda puzzle: puzzle.lower_row_invariant(0, 0), 17, "test2 solve_2x3")
+
+    #test 3: 3x2 board, solved through the transposed 2x3 table
+    puzzle = mycode.Puzzle(3, 2, [[1,3],[4,2],[5,0]])
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_3x2(), lambda puzzle: puzzle.lower_row_invariant(0, 0), 5, "test3 solve_3x2")
+
+    #test 4: 4x2 board, solve_puzzle ends in the 3x2 part
+    puzzle = mycode.Puzzle(4, 2, [[1,3],[4,2],[7,6],[5,0]])
+    check_moves(suite, puzzle, lambda puzzle: puzzle.solve_puzzle(), lambda puzzle: puzzle.lower_row_invariant(0, 0), 14, "test4 solve_puzzle")
+
+    # report number of tests and failures
+    suite.report_results()
+
 def run_test_solve_puzzle():
     """
-    Tests for verifying Puzzle method solve_puzzle
+    Tests for verifying Puzzle method solve_puzzle on the corpus
     """  
     # create a TestSuite object
     suite = poc_simpletest.TestSuite()
 
-    #test1, 2x2, solvable
+    for index in range(len(CORPUS)):
+        height, width, grid, max_moves = CORPUS[index]
+        message = "test" + str(index + 1) + " solve_puzzle " + str(height) + "x" + str(width)
+        puzzle = mycode.Puzzle(height, width, grid)
+
+        start = time.time()
+        check_moves(suite, puzzle, lambda puzzle: puzzle.solve_puzzle(), lambda puzzle: puzzle.lower_row_invariant(0, 0), max_moves, message)
+        elapsed = time.time() - start
+
+        suite.run_test(elapsed <= TIME_LIMITS[(height, width)], True, message + " time")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_heuristics():
+    """
+    Tests for verifying Puzzle methods get_manhattan and get_linear_conflict
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    #test1, 2x2, no conflicts
     puzzle = mycode.Puzzle(2, 2, [[2,1],[3,0]])
-    suite.run_test(puzzle.solve_puzzle(), "lu", "test1 solve_puzzle.")
-    
-    #test2, 3x3, solvable
-    puzzle = mycode.Puzzle(3, 3, [[2,4,0],[3,1,5],[6,7,8]])
-    suite.run_test(puzzle.solve_puzzle(), "ddulduldurrulduldruldurdlurrdluldrruldlu", "test2 solve_puzzle.")
-    
-    #test3, 4x4, solvable
+    suite.run_test(puzzle.get_manhattan(), 2, "test1 get_manhattan.")
+    suite.run_test(puzzle.get_linear_conflict(), 0, "test1 get_linear_conflict.")
+
+    #test2, 3x3, tiles 1 and 2 swapped in their solved row
+    puzzle = mycode.Puzzle(3, 3, [[0,2,1],[3,4,5],[6,7,8]])
+    suite.run_test(puzzle.get_manhattan(), 2, "test2 get_manhattan.")
+    suite.run_test(puzzle.get_linear_conflict(), 2, "test2 get_linear_conflict.")
+
+    #test3, 4x4, incremental values equal values computed from scratch
+    puzzle = mycode.Puzzle(4, 4, [[14,2,7,12], [8,4,6,3], [1,9,10,0], [13,5,15,11]])
+    puzzle.update_puzzle("lluurdldrr")
+    fresh = puzzle.clone()
+    suite.run_test(puzzle.get_manhattan(), fresh.get_manhattan(), "test3 get_manhattan.")
+    suite.run_test(puzzle.get_linear_conflict(), fresh.get_linear_conflict(), "test3 get_linear_conflict.")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_undo_move():
+    """
+    Tests for verifying Puzzle method undo_move
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    #test1, 4x4, undo restores grid and heuristic values
     puzzle = mycode.Puzzle(4, 4, [[4,6,1,3],[5,2,0,7],[8,9,10,11],[12,13,14,15]])
-    suite.run_test(puzzle.solve_puzzle(), "drduldulduldurrrlulduldurrrlurlduldruldurldlu", "test3 solve_puzzle")
-    
-    #test4, 3x3, solvable
+    manhattan, conflict = puzzle.get_manhattan(), puzzle.get_linear_conflict()
+    puzzle.update_puzzle("ldrurd")
+    puzzle.undo_move("ldrurd")
+    suite.run_test(str(puzzle), str(mycode.Puzzle(4, 4, [[4,6,1,3],[5,2,0,7],[8,9,10,11],[12,13,14,15]])), "test1 undo_move.")
+    suite.run_test((puzzle.get_manhattan(), puzzle.get_linear_conflict()), (manhattan, conflict), "test1 undo_move heuristics.")
+
+    #test2, 3x3, undo a solution string
     puzzle = mycode.Puzzle(3, 3, [[8, 7, 6], [5, 4, 3], [2, 1, 0]])
-    suite.run_test(puzzle.solve_puzzle(), "ululdrruldrulddrulduldrulduruldruldrdlurdluurddlurrllurrdlurldlurdlurrdluldrruldlurdlu", "test4 solve_puzzle")
-    
-    #test5, 4x4, solvable?
+    puzzle.undo_move(puzzle.solve_puzzle())
+    suite.run_test(str(puzzle), str(mycode.Puzzle(3, 3, [[8, 7, 6], [5, 4, 3], [2, 1, 0]])), "test2 undo_move.")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_solve_optimal():
+    """
+    Tests for verifying Puzzle method solve_optimal
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    #test1, 2x2, solvable
+    puzzle = mycode.Puzzle(2, 2, [[2,1],[3,0]])
+    suite.run_test(puzzle.solve_optimal(), "lu", "test1 solve_optimal.")
+
+    #test2, 3x3, 28 moves is optimal
+    puzzle = mycode.Puzzle(3, 3, [[8, 7, 6], [5, 4, 3], [2, 1, 0]])
+    suite.run_test(len(puzzle.solve_optimal()), 28, "test2 solve_optimal.")
+    suite.run_test(str(puzzle), str(mycode.Puzzle(3, 3)), "test2 solve_optimal solved.")
+
+    #test3, 4x4, solution shorter than the split depth of the search tree
+    puzzle = mycode.Puzzle(4, 4, [[1,0,2,3],[4,5,6,7],[8,9,10,11],[12,13,14,15]])
+    suite.run_test(puzzle.solve_optimal(), "l", "test3 solve_optimal.")
+
+    #test4, 4x4, 7 moves is optimal
+    puzzle = mycode.Puzzle(4, 4, [[4,6,1,3],[5,2,0,7],[8,9,10,11],[12,13,14,15]])
+    suite.run_test(len(puzzle.solve_optimal()), 7, "test4 solve_optimal.")
+    suite.run_test(str(puzzle), str(mycode.Puzzle(4, 4)), "test4 solve_optimal solved.")
+
+    #test5, 4x4, subtrees searched by two worker processes, 15 moves is optimal
+    puzzle = mycode.Puzzle(4, 4, [[4,1,2,7],[8,5,3,11],[12,9,6,10],[13,14,0,15]])
+    suite.run_test(len(puzzle.solve_optimal(2)), 15, "test5 solve_optimal.")
+    suite.run_test(str(puzzle), str(mycode.Puzzle(4, 4)), "test5 solve_optimal solved.")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_transpose():
+    """
+    Tests for verifying Puzzle methods transpose and canonical_key
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    #test1, 2x3, solved puzzle maps to solved 3x2 puzzle
+    puzzle = mycode.Puzzle(2, 3)
+    suite.run_test(str(puzzle.transpose()), str(mycode.Puzzle(3, 2)), "test1 transpose.")
+
+    #test2, 3x3, tiles relabeled along with their positions
+    puzzle = mycode.Puzzle(3, 3, [[1,0,2],[3,4,5],[6,7,8]])
+    suite.run_test(str(puzzle.transpose()), str(mycode.Puzzle(3, 3, [[3,1,2],[0,4,5],[6,7,8]])), "test2 transpose.")
+
+    #test3, 3x3, puzzle and its transpose share their canonical key
+    key, transposed = puzzle.canonical_key()
+    other_key, other_transposed = puzzle.transpose().canonical_key()
+    suite.run_test(key, other_key, "test3 canonical_key.")
+    suite.run_test(transposed != other_transposed, True, "test3 canonical_key transposed.")
+
+    #test4, 3x3, solve_optimal reuses the solution of the transpose
+    puzzle = mycode.Puzzle(3, 3, [[3,1,2],[4,0,5],[6,7,8]])
+    suite.run_test(puzzle.solve_optimal(), "lu", "test4 solve_optimal.")
+    puzzle = mycode.Puzzle(3, 3, [[1,4,2],[3,0,5],[6,7,8]])
+    suite.run_test(puzzle.solve_optimal(), "ul", "test4 solve_optimal transposed.")
+    suite.run_test(str(puzzle), str(mycode.Puzzle(3, 3)), "test4 solve_optimal solved.")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_macro_tables():
+    """
+    Tests for verifying the macro tables of the phase methods
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    #test1, 4x4, interior tile at the same position on another board: the
+    #table hit applies the moves of the step by step placement
+    grid = [[1,10,4,3],[2,5,7,6],[9,8,0,11],[12,13,14,15]]
+    mycode.MACRO_TABLES.clear()
+    built = mycode.Puzzle(4, 4, grid)
+    moves = built.solve_interior_tile(2, 2)
+    mycode.MACRO_TABLES.clear()
+    mycode.Puzzle(4, 4, [[4,10,1,3],[5,2,6,7],[8,9,0,11],[12,13,14,15]]).solve_interior_tile(2, 2)
+    puzzle = mycode.Puzzle(4, 4, grid)
+    suite.run_test(puzzle.solve_interior_tile(2, 2), moves, "test1 macro table moves.")
+    suite.run_test(str(puzzle), str(built), "test1 macro table board.")
+    suite.run_test(puzzle.lower_row_invariant(2, 1), True, "test1 macro table invariant.")
+
+    #test2, 4x4, the same for a tile in column zero
+    grid = [[1,4,8,3],[6,2,5,7],[0,9,10,11],[12,13,14,15]]
+    mycode.MACRO_TABLES.clear()
+    built = mycode.Puzzle(4, 4, grid)
+    moves = built.solve_col0_tile(2)
+    mycode.MACRO_TABLES.clear()
+    mycode.Puzzle(4, 4, [[4,1,8,3],[5,2,6,7],[0,9,10,11],[12,13,14,15]]).solve_col0_tile(2)
+    puzzle = mycode.Puzzle(4, 4, grid)
+    suite.run_test(puzzle.solve_col0_tile(2), moves, "test2 macro table moves.")
+    suite.run_test(str(puzzle), str(built), "test2 macro table board.")
+    suite.run_test(puzzle.lower_row_invariant(1, 3), True, "test2 macro table invariant.")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_verify_solutions():
+    """
+    Tests for verifying function verify_solutions
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    grids = [[[2,1],[3,0]], [[2,1],[3,0]], [[2,1],[3,0]], [[2,1],[3,0]]]
+
+    #test1, 2x2, valid solution
+    suite.run_test(mycode.verify_solutions(2, 2, grids[:1], ["lu"]), [], "test1 verify_solutions.")
+
+    #test2, 2x2, move off grid, invalid direction and unsolved puzzle
+    failures = mycode.verify_solutions(2, 2, grids, ["lu", "lul", "lx", "l"])
+    suite.run_test(failures, [(1, 2, "move off grid: l"), (2, 1, "invalid direction: x"), (3, 1, "puzzle not solved")], "test2 verify_solutions.")
+
+    #test3, 4x4, solve_puzzle output replays
+    grid = [[14,2,7,12], [8,4,6,3], [1,9,10,0], [13,5,15,11]]
+    moves = mycode.Puzzle(4, 4, grid).solve_puzzle()
+    suite.run_test(mycode.verify_solutions(4, 4, [grid], [moves]), [], "test3 verify_solutions.")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_encoding():
+    """
+    Tests for verifying Puzzle methods get_encoding and set_encoding
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    #test1, 2x2, two bits per tile in row major order
+    puzzle = mycode.Puzzle(2, 2, [[2,1],[3,0]])
+    suite.run_test(puzzle.get_encoding(), 2 + (1 << 2) + (3 << 4), "test1 get_encoding.")
+
+    #test2, 4x4, incremental encoding equals encoding computed from scratch
     puzzle = mycode.Puzzle(4, 4, [[14,2,7,12], [8,4,6,3], [1,9,10,0], [13,5,15,11]])
-    suite.run_test(puzzle.solve_puzzle(), "dlululurdlurrdldrulddruldlurururldruldrullddruldrulldruldrdlurdluurddlurrrlullurrdldruldurlldruldrulduurdlruldrdlurdluurddlurrruldruldurlduldurdlurrdluldrruldlurldlurdlurrdluldrruldlurdlu", "test5 solve_puzzle")
-    
-    #test6, 4x4, solvable
-    puzzle = mycode.Puzzle(4, 4, [[4,11,1,3], [12,0,5,2], [13,6,9,7], [14,10,8,15]])
-    suite.run_test(puzzle.solve_puzzle(), "drdrlllurrdlluurdlruldrdlurdluurddlurrrululdrruldrulddruldluulddruldurlruldrdlurdluurddlurrrlurlduldurdlurrdluldrruldulldruldurrdlurldlu", "test6 solve_puzzle")
-    
+    puzzle.update_puzzle("lluurdldrr")
+    suite.run_test(puzzle.get_encoding(), puzzle.clone().get_encoding(), "test2 get_encoding.")
+
+    #test3, 4x4, set_encoding restores the grid
+    other = mycode.Puzzle(4, 4)
+    other.set_encoding(puzzle.get_encoding())
+    suite.run_test(str(other), str(puzzle), "test3 set_encoding.")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_solve_astar():
+    """
+    Tests for verifying Puzzle method solve_astar
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    #test1, 2x2, solvable
+    puzzle = mycode.Puzzle(2, 2, [[2,1],[3,0]])
+    suite.run_test(puzzle.solve_astar(), "lu", "test1 solve_astar.")
+
+    #test2, 3x3, 28 moves is optimal
+    puzzle = mycode.Puzzle(3, 3, [[8, 7, 6], [5, 4, 3], [2, 1, 0]])
+    suite.run_test(len(puzzle.solve_astar()), 28, "test2 solve_astar.")
+    suite.run_test(str(puzzle), str(mycode.Puzzle(3, 3)), "test2 solve_astar solved.")
+
+    #test3, 4x4, memory budget exceeded, falls back to solve_optimal
+    puzzle = mycode.Puzzle(4, 4, [[4,6,1,3],[5,2,0,7],[8,9,10,11],[12,13,14,15]])
+    suite.run_test(len(puzzle.solve_astar(5)), 7, "test3 solve_astar.")
+    suite.run_test(str(puzzle), str(mycode.Puzzle(4, 4)), "test3 solve_astar solved.")
+
+    #test4, StateStore packs cost and move, refuses boards beyond its size
+    store = mycode.StateStore(1)
+    suite.run_test(store.add(10, 3, "u"), True, "test4 StateStore add.")
+    suite.run_test((store.get_cost(10), store.get_move(10)), (3, "u"), "test4 StateStore get.")
+    suite.run_test(store.add(11, 4, "d"), False, "test4 StateStore full.")
+
+    #test5, StateStore open list pops the smallest estimate, its entries count toward the size
+    store = mycode.StateStore(3)
+    store.add(10, 0, None)
+    suite.run_test((store.push(10, 5), store.push(11, 4)), (True, True), "test5 StateStore push.")
+    suite.run_test(store.add(12, 1, "l"), False, "test5 StateStore full.")
+    suite.run_test((store.pop(), store.pop()), ((11, 4), (10, 5)), "test5 StateStore pop.")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_solution_exporter():
+    """
+    Tests for verifying class SolutionExporter and function load_frame
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    #test1, 2x2, start record, packed moves and end record
+    puzzle = mycode.Puzzle(2, 2, [[2,1],[3,0]])
+    exporter = mycode.SolutionExporter(puzzle)
+    exporter.record(puzzle.solve_puzzle())
+    exporter.finish()
+    suite.run_test(exporter.get_records(), [("start", 2, 2, 2 + (1 << 2) + (3 << 4), (1 << 2) + (2 << 4) + (3 << 6)), ("moves", 2, 0 + (2 << 2)), ("end", 2)], "test1 SolutionExporter.")
+
+    #test2, 4x4, solve_puzzle streams its moves with keyframes every 16 moves
+    grid = [[14,2,7,12], [8,4,6,3], [1,9,10,0], [13,5,15,11]]
+    puzzle = mycode.Puzzle(4, 4, grid)
+    exporter = mycode.SolutionExporter(puzzle, None, 16)
+    moves = puzzle.solve_puzzle(exporter)
+    exporter.finish()
+    records = exporter.get_records()
+    suite.run_test(records[-1], ("end", len(moves)), "test2 SolutionExporter.")
+    suite.run_test(len([record for record in records if record[0] == "keyframe"]), len(moves) // 16, "test2 SolutionExporter keyframes.")
+
+    #test3, 4x4, frames equal the replayed board at that step
+    for step in [0, 15, 16, 17, 50, len(moves)]:
+        replayed = mycode.Puzzle(4, 4, grid)
+        replayed.update_puzzle(moves[:step])
+        suite.run_test(str(mycode.load_frame(records, step)), str(replayed), "test3 load_frame step " + str(step))
+
+    #test4, 4x4, frames of a stream solved to another goal keep that goal
+    goal = [[1,2,3,4],[5,6,7,8],[9,10,11,12],[13,14,15,0]]
+    puzzle = mycode.Puzzle(4, 4, [[5,1,2,3],[9,6,7,4],[13,10,11,8],[14,15,12,0]], goal)
+    exporter = mycode.SolutionExporter(puzzle, None, 16)
+    moves = puzzle.solve_puzzle(exporter)
+    exporter.finish()
+    frame = mycode.load_frame(exporter.get_records(), len(moves))
+    suite.run_test(frame.get_goal(), goal, "test4 load_frame goal.")
+    suite.run_test(frame.get_manhattan(), 0, "test4 load_frame solved.")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_bounds():
+    """
+    Tests for verifying Puzzle methods lower_bound, upper_bound and
+    function rate_boards
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    #test1, 2x3, exact distance from the endgame table
+    puzzle = mycode.Puzzle(2, 3, [[4,2,1],[3,5,0]])
+    suite.run_test(puzzle.lower_bound(), 17, "test1 lower_bound.")
+
+    #test2, 3x3, manhattan distance plus linear conflict
+    puzzle = mycode.Puzzle(3, 3, [[0,2,1],[3,4,5],[6,7,8]])
+    suite.run_test(puzzle.lower_bound(), 4, "test2 lower_bound.")
+
+    #test3, 4x4, bounds enclose the optimal solution length 7, puzzle unchanged
+    grid = [[4,6,1,3],[5,2,0,7],[8,9,10,11],[12,13,14,15]]
+    puzzle = mycode.Puzzle(4, 4, grid)
+    suite.run_test(puzzle.lower_bound() <= 7 <= puzzle.upper_bound(), True, "test3 bounds.")
+    suite.run_test(str(puzzle), str(mycode.Puzzle(4, 4, grid)), "test3 upper_bound clone.")
+
+    #test4, 4x4, rate_boards returns one rating per grid
+    ratings = mycode.rate_boards(4, 4, [grid, [[0,1,2,3],[4,5,6,7],[8,9,10,11],[12,13,14,15]]])
+    suite.run_test(ratings[1], (0, 0), "test4 rate_boards.")
+    suite.run_test(ratings[0], (puzzle.lower_bound(), puzzle.upper_bound()), "test4 rate_boards.")
+    suite.run_test(mycode.rate_boards(4, 4, [grid], False), [(puzzle.lower_bound(), None)], "test4 rate_boards lower only.")
+
+    #test5, 3x4, lower bounds only, computed without Puzzle objects, match lower_bound for another goal
+    goal = [[1,2,3,4],[5,6,7,8],[9,10,11,0]]
+    grids = [[[2,1,3,4],[5,6,7,8],[9,10,0,11]], [[0,11,10,9],[8,7,6,5],[4,3,2,1]], goal]
+    expected = [(mycode.Puzzle(3, 4, grid, goal).lower_bound(), None) for grid in grids]
+    suite.run_test(mycode.rate_boards(3, 4, grids, False, goal), expected, "test5 rate_boards lower only.")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_flat_board():
+    """
+    Tests for verifying functions apply_moves and board_heuristics, the
+    compiled puzzle_accel functions (where built) against the pure-Python
+    reference
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    grids = [[[14,2,7,12],[8,4,6,3],[1,9,10,0],[13,5,15,11]], [[0,1,2],[3,4,5]], [[4,2,1],[3,5,0]]]
+    moves = ["lluurdldrr", "rrdlu", "ulx"]
+    goal = [[1,2,3],[4,5,0]]
+    accel = mycode.puzzle_accel
+    results = []
+    for compiled in [accel, None]:
+        mycode.puzzle_accel = compiled
+        result = []
+        for index in range(len(grids)):
+            cells = []
+            for row in grids[index]:
+                cells.extend(row)
+            applied = mycode.apply_moves(cells, len(grids[index][0]), moves[index])
+            result.append((applied, cells, mycode.Puzzle(len(grids[index]), len(grids[index][0]), grids[index]).lower_bound()))
+        result.append(mycode.Puzzle(2, 3, [[4,2,1],[3,5,0]], goal).get_linear_conflict())
+        result.append(mycode.verify_solutions(2, 3, grids[1:], ["rrdl", "ul"], goal))
+        result.append(mycode.rate_boards(4, 4, grids[:1], False))
+        results.append(result)
+    mycode.puzzle_accel = accel
+
+    #test1, 4x4, 2x3, moves applied up to the first invalid one
+    suite.run_test([applied for applied, cells, bound in results[1][:3]], [10, 5, 2], "test1 apply_moves.")
+    suite.run_test(results[1][2][1], [4,0,2,3,5,1], "test1 apply_moves cells.")
+
+    #test2, compiled and pure-Python functions agree
+    suite.run_test(results[0], results[1], "test2 puzzle_accel.")
+
     # report number of tests and failures
     suite.report_results()
- 
+
+def run_test_solve_batch():
+    """
+    Tests for verifying function solve_batch
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    boards = [("b1", [[2,1],[3,0]]), ("b2", [[1,0],[2,3]]), ("b3", [[0,1],[2,3]])]
+
+    #test1, 2x2, results in shards of two and a checkpoint line per board and shard
+    checkpoint = []
+    shards = mycode.solve_batch(2, 2, boards, checkpoint, 2)
+    suite.run_test(shards, [[("b1", "lu"), ("b2", "dlurdlurdlu")], [("b3", "drlu")]], "test1 solve_batch.")
+    suite.run_test(checkpoint, ["b1:lu", "b2:dlurdlurdlu", "#shard 0", "b3:drlu", "#shard 1"], "test1 solve_batch checkpoint.")
+
+    #test2, 2x2, resume after a crash: b1 solved, no shard written yet
+    checkpoint = ["b1:lu"]
+    shards = mycode.solve_batch(2, 2, boards, checkpoint, 2)
+    suite.run_test(shards, [[("b1", "lu"), ("b2", "dlurdlurdlu")], [("b3", "drlu")]], "test2 solve_batch.")
+
+    #test3, 2x2, resume after shard 0: nothing is solved or written twice
+    checkpoint = ["b1:lu", "b2:dlurdlurdlu", "#shard 0", "b3:drlu", "#shard 1"]
+    suite.run_test(mycode.solve_batch(2, 2, boards, checkpoint, 2), [], "test3 solve_batch.")
+    suite.run_test(len(checkpoint), 5, "test3 solve_batch checkpoint.")
+
+    boards = boards + [("b4", [[2,1],[3,0]]), ("b5", [[1,0],[2,3]]), ("b6", [[0,1],[2,3]])]
+
+    #test4, 2x2, crash before shard 0 was written and while b3 was appended: the full
+    #shard is written first, the cut off line is skipped
+    checkpoint = ["b1:lu", "b2:dlurdlurdlu", "b"]
+    shards = mycode.solve_batch(2, 2, boards, checkpoint, 2)
+    suite.run_test(shards, [[("b1", "lu"), ("b2", "dlurdlurdlu")], [("b3", "drlu"), ("b4", "lu")], [("b5", "dlurdlurdlu"), ("b6", "drlu")]], "test4 solve_batch.")
+    suite.run_test(checkpoint[3], "#shard 0", "test4 solve_batch checkpoint.")
+
+    #test5, 2x2, the last line may be cut off after the colon, its board is solved again
+    checkpoint = ["b1:lu", "b2:dlu"]
+    shards = mycode.solve_batch(2, 2, boards[:3], checkpoint, 2)
+    suite.run_test(shards, [[("b1", "lu"), ("b2", "dlurdlurdlu")], [("b3", "drlu")]], "test5 solve_batch.")
+
+    #test6, 2x2, a later result replaces the earlier one of the same board
+    checkpoint = ["b1:lu", "b2:dlu", "b2:dlurdlurdlu", "b3:drlu"]
+    suite.run_test(mycode.solve_batch(2, 2, boards[:3], checkpoint, 3), [[("b1", "lu"), ("b2", "dlurdlurdlu"), ("b3", "drlu")]], "test6 solve_batch.")
+
+    #test7, 2x2, a board id that looks like a shard mark is still a result
+    boards = [("#shard x", [[2,1],[3,0]])] + boards[1:3]
+    checkpoint = ["#shard x:lu", "b2:dlurdlurdlu"]
+    shards = mycode.solve_batch(2, 2, boards, checkpoint, 2)
+    suite.run_test(shards, [[("#shard x", "lu"), ("b2", "dlurdlurdlu")], [("b3", "drlu")]], "test7 solve_batch.")
+
+    #test8, 2x2, CheckpointFile drops a cut off last line and writes whole lines
+    if tempfile is not None:
+        handle, path = tempfile.mkstemp()
+        mycode.os.close(handle)
+        with open(path, "wb") as stored:
+            stored.write(b"b1:lu\nb2:dlurdlurdlu\n#shard 0\nb3:dr")
+        checkpoint = mycode.CheckpointFile(path)
+        shards = mycode.solve_batch(2, 2, boards[1:], checkpoint, 2)
+        checkpoint.close()
+        suite.run_test(shards, [[("b3", "drlu")]], "test8 solve_batch.")
+        with open(path, "rb") as stored:
+            suite.run_test(stored.read(), b"b1:lu\nb2:dlurdlurdlu\n#shard 0\nb3:drlu\n#shard 1\n", "test8 solve_batch file.")
+        checkpoint = mycode.CheckpointFile(path)
+        suite.run_test(mycode.solve_batch(2, 2, boards[1:], checkpoint, 2), [], "test8 solve_batch resumed.")
+        checkpoint.close()
+        mycode.os.remove(path)
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_goal():
+    """
+    Tests for verifying Puzzle with a goal_grid other than the default
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    # classic fifteen puzzle goal, zero tile in lower right
+    goal = [[1,2,3,4],[5,6,7,8],[9,10,11,12],[13,14,15,0]]
+    grid = [[5,1,2,3],[9,6,7,4],[13,10,11,8],[14,15,12,0]]
+
+    #test1, default grid is the goal, default goal is the zero tile in upper left
+    suite.run_test(str(mycode.Puzzle(4, 4, None, goal)), str(mycode.Puzzle(4, 4, goal)), "test1 goal default grid.")
+    suite.run_test(mycode.Puzzle(2, 2).get_goal(), [[0,1],[2,3]], "test1 get_goal.")
+
+    #test2, heuristics measure the distance to the goal
+    puzzle = mycode.Puzzle(4, 4, grid, goal)
+    suite.run_test(puzzle.get_manhattan(), 12, "test2 get_manhattan.")
+    suite.run_test(mycode.Puzzle(4, 4, goal, goal).lower_bound(), 0, "test2 lower_bound.")
+
+    #test3, solve_puzzle ends in the goal
+    puzzle = mycode.Puzzle(4, 4, grid, goal)
+    moves = puzzle.solve_puzzle()
+    suite.run_test(str(puzzle), str(mycode.Puzzle(4, 4, goal)), "test3 solve_puzzle.")
+    suite.run_test(mycode.verify_solutions(4, 4, [grid], [moves], goal), [], "test3 verify_solutions.")
+
+    #test4, solve_optimal ends in the goal, 12 moves is optimal
+    puzzle = mycode.Puzzle(4, 4, grid, goal)
+    suite.run_test(puzzle.solve_optimal(), "llluuurrrddd", "test4 solve_optimal.")
+
+    # report number of tests and failures
+    suite.report_results()
+
+def run_test_add_listener():
+    """
+    Tests for verifying Puzzle method add_listener
+    """
+    # create a TestSuite object
+    suite = poc_simpletest.TestSuite()
+
+    #test1, 3x3, solve_puzzle publishes phases, placed tiles and the result
+    events = []
+    puzzle = mycode.Puzzle(3, 3, [[8, 7, 6], [5, 4, 3], [2, 1, 0]])
+    puzzle.add_listener(lambda event, data: events.append((event, data)))
+    moves = puzzle.solve_puzzle()
+    phases = [data["phase"] for event, data in events if event == "phase"]
+    suite.run_test(phases, ["interior", "col0", "2x3"], "test1 add_listener phases.")
+    suite.run_test([data["tiles"] for event, data in events if event == "tile"], [1, 2, 3], "test1 add_listener tiles.")
+    suite.run_test(events[-1][0], "done", "test1 add_listener done.")
+    suite.run_test(events[-1][1]["moves"], len(moves), "test1 add_listener moves.")
+    suite.run_test("elapsed" in events[-1][1], True, "test1 add_listener elapsed.")
+
+    #test2, 4x4, solve_optimal publishes each bound and sampled node counts
+    events = []
+    interval = mycode.TELEMETRY_INTERVAL
+    mycode.TELEMETRY_INTERVAL = 1
+    puzzle = mycode.Puzzle(4, 4, [[4,6,1,3],[5,2,0,7],[8,9,10,11],[12,13,14,15]])
+    puzzle.add_listener(lambda event, data: events.append((event, data)))
+    puzzle.solve_astar()
+    puzzle = mycode.Puzzle(4, 4, [[1,5,2,3],[4,0,6,7],[8,9,10,11],[12,13,14,15]])
+    puzzle.add_listener(lambda event, data: events.append((event, data)))
+    puzzle.solve_optimal()
+    mycode.TELEMETRY_INTERVAL = interval
+    kinds = [event for event, data in events]
+    suite.run_test(kinds.count("done"), 2, "test2 add_listener done.")
+    suite.run_test("bound" in kinds and "nodes" in kinds, True, "test2 add_listener search events.")
+
+    #test3, 4x4, solve_optimal with worker processes publishes a node count per subtree
+    events = []
+    mycode.OPTIMAL_CACHE.clear()
+    puzzle = mycode.Puzzle(4, 4, [[4,1,2,7],[8,5,3,11],[12,9,6,10],[13,14,0,15]])
+    puzzle.add_listener(lambda event, data: events.append((event, data)))
+    puzzle.solve_optimal(2)
+    nodes = [data for event, data in events if event == "nodes"]
+    suite.run_test(len(nodes) > 0, True, "test3 add_listener nodes.")
+    suite.run_test(nodes[-1]["nodes"], events[-1][1]["nodes"], "test3 add_listener node total.")
+    suite.run_test(nodes[-1]["bound"], 15, "test3 add_listener bound.")
+
+    # report number of tests and failures
+    suite.report_results()
+
 run_test_lower_row_invariant()
 run_test_solve_interior_tile()
 run_test_solve_col0_tile()
@@ -245,5 +802,20 @@ run_test_row0_invariant()
 run_test_solve_row1_tile()
 run_test_solve_row0_tile()    
 run_test_solve_2x2()
+run_test_solve_2x3()
 run_test_solve_puzzle()
+run_test_heuristics()
+run_test_undo_move()
+run_test_solve_optimal()
+run_test_transpose()
+run_test_macro_tables()
+run_test_verify_solutions()
+run_test_encoding()
+run_test_solve_astar()
+run_test_solution_exporter()
+run_test_bounds()
+run_test_flat_board()
+run_test_solve_batch()
+run_test_goal()
+run_test_add_listener()
 